@@ -0,0 +1,103 @@
+"""Benchmark float, int64-cent and Decimal amortization.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_exact_rounding
+"""
+import time
+from decimal import Decimal, ROUND_HALF_EVEN
+
+import numpy as np
+
+from financewebapp.services.loan_engine import (
+    MONTHLY_RATE_DIVISOR,
+    RATE_SCALE,
+    amortization_arrays,
+    evaluate_loan_portfolio,
+    exact_amortization_arrays,
+    exact_amortization_cents,
+)
+from financewebapp.services.loan_engine import _level_payment_cents
+
+CENT = Decimal("0.01")
+
+
+def decimal_schedule(principal, annual_interest_rate, loan_term_years, monthly_extra_payment):
+    """Reference integer-cent schedule built month by month with Decimal."""
+    total_months = loan_term_years * 12
+    balance_cents = round(principal * 100)
+    rate_units = round(annual_interest_rate * RATE_SCALE)
+    balance = Decimal(balance_cents) / 100
+    rate = Decimal(rate_units) / MONTHLY_RATE_DIVISOR
+    extra = Decimal(round(monthly_extra_payment * 100)) / 100
+    # The level payment is computed in floating point and rounded to the cent, as in the engine
+    payment = Decimal(int(_level_payment_cents(balance_cents, rate_units, total_months))) / 100
+
+    posted = []
+    for month in range(1, total_months + 1):
+        interest = (balance * rate).quantize(CENT, rounding=ROUND_HALF_EVEN)
+        owed = balance + interest
+        payment_posted = owed if owed <= payment + extra or month == total_months else payment + extra
+        balance = owed - payment_posted
+        posted.append((payment_posted, interest, balance))
+        if balance == 0:
+            break
+    return posted
+
+
+def timed(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(loans=10_000, decimal_loans=200, seed=0):
+    rng = np.random.default_rng(seed)
+    principal = np.round(rng.uniform(10_000, 1_000_000, loans), 2)
+    rate = np.round(rng.uniform(0.5, 12.0, loans), 2)
+    years = rng.integers(5, 31, loans)
+    extra = np.where(rng.random(loans) < 0.5, 0.0, np.round(rng.uniform(0, 1_000, loans), 2))
+
+    # Exactness: the int64 book engine and the single-loan engine must post the same cents as Decimal
+    cents = exact_amortization_cents(principal[:decimal_loans], rate[:decimal_loans],
+                                     years[:decimal_loans], extra[:decimal_loans])
+    for loan in range(decimal_loans):
+        reference = decimal_schedule(principal[loan], rate[loan], int(years[loan]), extra[loan])
+        months = int(cents["payoff_month"][loan])
+        assert months == len(reference)
+        assert all(
+            (int(payment * 100), int(interest * 100), int(balance * 100)) == (
+                cents["payment"][loan, month], cents["interest"][loan, month], cents["balance"][loan, month]
+            )
+            for month, (payment, interest, balance) in enumerate(reference)
+        )
+        single = exact_amortization_arrays(principal[loan], rate[loan], int(years[loan]), extra[loan])
+        assert [
+            (round(payment * 100), round(interest * 100), round(balance * 100))
+            for payment, interest, balance in zip(
+                single["Monthly Payment (€)"], single["Interest Payment (€)"], single["Remaining Balance (€)"]
+            )
+        ] == [(int(payment * 100), int(interest * 100), int(balance * 100)) for payment, interest, balance in reference]
+    print(f"int64 and single-loan cents match Decimal exactly on {decimal_loans} loans")
+
+    print("\nSingle 30-year loan (schedule columns, before building a DataFrame)")
+    print(f"  float          {timed(lambda: amortization_arrays(300_000, 4.5, 30, 0)) * 1e3:8.2f} ms")
+    print(f"  integer cents  {timed(lambda: exact_amortization_arrays(300_000, 4.5, 30, 0)) * 1e3:8.2f} ms")
+    print(f"  Decimal        {timed(lambda: decimal_schedule(300_000, 4.5, 30, 0)) * 1e3:8.2f} ms")
+
+    print(f"\nBook of {loans:,} loans")
+    float_seconds = timed(lambda: evaluate_loan_portfolio(principal, rate, years, extra))
+    cents_seconds = timed(lambda: exact_amortization_cents(principal, rate, years, extra))
+    decimal_seconds = timed(
+        lambda: [decimal_schedule(principal[i], rate[i], int(years[i]), extra[i]) for i in range(decimal_loans)], 1
+    ) * loans / decimal_loans
+    print(f"  float          {float_seconds:8.3f} s")
+    print(f"  int64 cents    {cents_seconds:8.3f} s")
+    print(f"  Decimal        {decimal_seconds:8.3f} s  (extrapolated from {decimal_loans} loans)")
+
+
+if __name__ == "__main__":
+    main()
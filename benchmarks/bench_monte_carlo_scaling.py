@@ -0,0 +1,45 @@
+"""Scaling benchmark for the multi-process retirement Monte Carlo engine.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_monte_carlo_scaling --paths 1000000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from financewebapp.services.retirement_engine import PRODUCT_RETURN_MODELS, simulate_retirement
+
+
+def run(paths, workers, seed):
+    start = time.perf_counter()
+    result = simulate_retirement(
+        30, 65, 95, 10_000.0, 1_000.0, 0.0, 6.0, 15.0, 2.0, 2_000.0, PRODUCT_RETURN_MODELS["ETF"],
+        paths=paths, seed=seed, workers=workers,
+    )
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paths", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.paths:,} paths, monthly steps from age 30 to 95, {os.cpu_count()} CPUs available")
+    baseline_seconds, baseline = None, None
+    for workers in args.workers:
+        seconds, result = run(args.paths, workers, args.seed)
+        if baseline is None:
+            baseline_seconds, baseline = seconds, result
+        identical = (np.array_equal(result["percentiles"], baseline["percentiles"])
+                     and result["success_probability"] == baseline["success_probability"])
+        print(f"  {workers} worker(s): {seconds:7.2f} s  speed-up {baseline_seconds / seconds:4.2f}x  "
+              f"identical results: {identical}")
+
+
+if __name__ == "__main__":
+    main()
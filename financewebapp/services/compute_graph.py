@@ -0,0 +1,78 @@
+"""Memoized dependency graph for page calculations.
+
+Each node is a function whose parameter names are its dependencies: either
+other nodes or plain inputs. A node recomputes only when one of its own
+dependencies changed since its last evaluation, so a widget change only
+reruns the nodes downstream of it.
+"""
+import inspect
+import time
+
+import numpy as np
+
+
+def _freeze(value):
+    """Comparable snapshot of an input value; arrays and containers are compared by content."""
+    if isinstance(value, np.ndarray):
+        return ("ndarray", value.shape, value.dtype.str, value.tobytes())
+    if isinstance(value, dict):
+        return ("dict", tuple((key, _freeze(item)) for key, item in sorted(value.items())))
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_freeze(item) for item in value))
+    return value
+
+
+class ComputeGraph:
+    """Pull-based graph of memoized nodes with per-node timing and hit/miss counters."""
+
+    def __init__(self):
+        self._nodes = {}
+        self._inputs = {}
+        self._results = {}
+        self._stats = {}
+
+    def node(self, func):
+        """Register `func` as a node named after the function (usable as a decorator)."""
+        self._nodes[func.__name__] = (func, tuple(inspect.signature(func).parameters))
+        self._stats[func.__name__] = {"hits": 0, "misses": 0, "last_ms": 0.0, "total_ms": 0.0}
+        self._results.pop(func.__name__, None)
+        return func
+
+    def set_inputs(self, **inputs):
+        """Set the plain input values for the next evaluations."""
+        self._inputs.update(inputs)
+
+    def __getitem__(self, name):
+        """Value of a node or input, recomputing the node only if its dependencies changed."""
+        if name not in self._nodes:
+            return self._inputs[name]
+
+        func, dependencies = self._nodes[name]
+        values = {dependency: self[dependency] for dependency in dependencies}
+        key = tuple(self._version(dependency) for dependency in dependencies)
+        stats = self._stats[name]
+
+        cached = self._results.get(name)
+        if cached is not None and cached[0] == key:
+            stats["hits"] += 1
+            return cached[1]
+
+        start = time.perf_counter()
+        value = func(**values)
+        elapsed = (time.perf_counter() - start) * 1000
+        stats["misses"] += 1
+        stats["last_ms"] = elapsed
+        stats["total_ms"] += elapsed
+        version = cached[2] + 1 if cached is not None else 0
+        self._results[name] = (key, value, version)
+        return value
+
+    def _version(self, name):
+        # Nodes are identified by how many times they recomputed; inputs by their content
+        if name in self._nodes:
+            return (name, self._results[name][2])
+        return _freeze(self._inputs[name])
+
+    def stats(self):
+        """Hit/miss counters and timings (ms) per node, for debugging."""
+        return {name: dict(stats) for name, stats in self._stats.items()}
@@ -0,0 +1,725 @@
+"""Columnar amortization engine for the Loan Simulator.
+
+Only NumPy and pandas are used here, so the loan math can run from batch jobs
+and notebooks without a Streamlit session.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .solvers import newton_bisect
+
+SCHEDULE_COLUMNS = [
+    "Month",
+    "Monthly Payment (€)",
+    "Principal Payment (€)",
+    "Interest Payment (€)",
+    "Remaining Balance (€)",
+    "Total Interest Paid (€)",
+]
+
+# A balance of at most half a cent rounds to zero, so the loan counts as repaid
+PAID_OFF_BALANCE = 0.005
+
+
+def monthly_rate(annual_interest_rate):
+    """Convert an annual interest rate in percent to a monthly decimal rate."""
+    return np.asarray(annual_interest_rate, dtype=float) / 12 / 100
+
+
+def annuity_payment(principal, monthly_interest_rate, total_months):
+    """Fixed monthly payment that repays `principal` in `total_months` months."""
+    principal = np.asarray(principal, dtype=float)
+    rate = np.asarray(monthly_interest_rate, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = (1 + rate) ** total_months
+        payment = principal * (rate * growth) / (growth - 1)
+        return np.where(rate == 0, principal / total_months, payment)
+
+
+def balance_after(principal, monthly_interest_rate, payment, months):
+    """Unclamped balance left after `months` level payments of `payment`."""
+    rate = np.asarray(monthly_interest_rate, dtype=float)
+    growth = (1 + rate) ** months
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annuity_factor = np.where(rate == 0, months, (growth - 1) / rate)
+    return principal * growth - payment * annuity_factor
+
+
+def rate_resets(rate_schedule, total_months):
+    """Normalise a reset table of (month, annual rate) pairs, as every engine applies it.
+
+    Returns the rate of any reset at or before month 1, which applies from
+    the start (None if there is none), and a dict of the later resets by
+    month. Resets after `total_months` are dropped; for a repeated month the
+    last pair in sorted order wins.
+    """
+    initial_rate, resets = None, {}
+    for month, rate in sorted((int(month), float(rate)) for month, rate in rate_schedule or []):
+        if month > total_months:
+            break
+        if month <= 1:
+            initial_rate = rate
+        else:
+            resets[month] = rate
+    return initial_rate, resets
+
+
+def rate_segments(annual_interest_rate, rate_schedule, total_months):
+    """Turn a reset table of (month, annual rate) pairs into segment start months and monthly rates."""
+    initial_rate, resets = rate_resets(rate_schedule, total_months)
+    starts = [1, *resets]
+    rates = [float(annual_interest_rate) if initial_rate is None else initial_rate, *resets.values()]
+    return np.array(starts), monthly_rate(rates)
+
+
+def _segment_payments(principal, total_months, segment_starts, segment_rates, monthly_extra_payment):
+    """Recast the payment at every reset and return each segment's opening balance and payment.
+
+    Each fixed-rate segment is evaluated in closed form, so only a short
+    multiply-add recursion runs once per reset. Segments after the payoff are dropped.
+    """
+    segment_lengths = np.diff(np.append(segment_starts, total_months + 1))
+    payment_factors = annuity_payment(1.0, segment_rates, total_months - segment_starts + 1).tolist()
+    growths = ((1 + segment_rates) ** segment_lengths).tolist()
+    annuity_factors = (balance_after(0.0, segment_rates, -1.0, segment_lengths)).tolist()
+
+    opening_balances, payments = [], []
+    balance = principal
+    for payment_factor, growth, annuity_factor in zip(payment_factors, growths, annuity_factors):
+        payment = balance * payment_factor
+        opening_balances.append(balance)
+        payments.append(payment)
+        balance = balance * growth - (payment + monthly_extra_payment) * annuity_factor
+        if balance <= PAID_OFF_BALANCE:
+            break
+
+    return np.array(opening_balances), np.array(payments)
+
+
+def _amortize(opening_balance, total_months, segment_starts, segment_rates, monthly_extra_payment,
+              interest_paid=0.0):
+    """Amortize `opening_balance` from month `segment_starts[0]` to the end of the term."""
+    opening_balances, payments = _segment_payments(
+        opening_balance, total_months, segment_starts, segment_rates, monthly_extra_payment
+    )
+
+    # Map every month onto its fixed-rate segment
+    months = np.arange(segment_starts[0], total_months + 1)
+    segment = np.searchsorted(segment_starts, months, side="right") - 1
+    months, segment = months[segment < payments.size], segment[segment < payments.size]
+    rate = segment_rates[segment]
+    monthly_payment = payments[segment]
+    balance = balance_after(
+        opening_balances[segment], rate, monthly_payment + monthly_extra_payment,
+        months - segment_starts[segment] + 1,
+    )
+
+    # The schedule stops in the first month the balance is repaid
+    paid_off = np.flatnonzero(balance <= PAID_OFF_BALANCE)
+    if paid_off.size:
+        months, rate, monthly_payment, balance = (
+            column[:paid_off[0] + 1] for column in (months, rate, monthly_payment, balance)
+        )
+
+    previous_balance = np.concatenate(([opening_balance], balance[:-1]))
+    interest_payment = previous_balance * rate
+    principal_payment = monthly_payment - interest_payment
+
+    return {
+        "Month": months,
+        "Monthly Payment (€)": monthly_payment + monthly_extra_payment,
+        "Principal Payment (€)": principal_payment + monthly_extra_payment,
+        "Interest Payment (€)": interest_payment,
+        "Remaining Balance (€)": np.maximum(balance, 0.0),
+        "Total Interest Paid (€)": interest_paid + np.cumsum(interest_payment),
+    }
+
+
+def amortization_arrays(principal, annual_interest_rate, loan_term_years, monthly_extra_payment,
+                        rate_schedule=None):
+    """Compute the repayment schedule as a dict of NumPy columns."""
+    total_months = int(loan_term_years * 12)
+    segment_starts, segment_rates = rate_segments(annual_interest_rate, rate_schedule, total_months)
+    return _amortize(principal, total_months, segment_starts, segment_rates, monthly_extra_payment)
+
+
+def calculate_loan_schedule(principal, annual_interest_rate, loan_term_years, monthly_extra_payment,
+                            rate_schedule=None, exact=False):
+    """Calculate loan repayment schedule.
+
+    `rate_schedule` is an optional list of (month, annual rate) resets for
+    adjustable-rate loans; the payment is recast on the remaining balance and
+    term at every reset. With `exact=True` every amount is posted in whole
+    cents with banker's rounding, using the integer-cent engine.
+    """
+    engine = exact_amortization_arrays if exact else amortization_arrays
+    columns = engine(principal, annual_interest_rate, loan_term_years, monthly_extra_payment, rate_schedule)
+    return pd.DataFrame(columns, columns=SCHEDULE_COLUMNS)
+
+
+# ---------------------------
+# Shared LRU schedule cache
+# ---------------------------
+class ScheduleCache:
+    """Bounded LRU cache of loan schedules, shared by every session of the server process.
+
+    Keys are (principal, rate, term, extra payment, rate resets). On a miss, a
+    cached schedule with the same principal, term and extra payment is reused up
+    to the first month whose rate or reset differs, and only the rest is recomputed.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.partial_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, principal, annual_interest_rate, loan_term_years, monthly_extra_payment, rate_schedule=None):
+        """Return the schedule columns for these inputs, computing them only when needed."""
+        rate_schedule = tuple(sorted((int(month), float(rate)) for month, rate in rate_schedule or []))
+        key = (float(principal), float(annual_interest_rate), int(loan_term_years),
+               float(monthly_extra_payment), rate_schedule)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][1]
+            self.misses += 1
+            neighbours = [entry for cached_key, entry in self._entries.items()
+                          if cached_key[0] == key[0] and cached_key[2:4] == key[2:4]]
+
+        total_months = int(loan_term_years * 12)
+        segment_starts, segment_rates = rate_segments(annual_interest_rate, rate_schedule, total_months)
+        # Payments are recast at every reset, so a month's terms are its rate plus whether it resets
+        months = np.arange(1, total_months + 1)
+        monthly_terms = np.stack((
+            segment_rates[np.searchsorted(segment_starts, months, side="right") - 1],
+            np.isin(months, segment_starts),
+        ))
+        columns = self._reuse_prefix(neighbours, key, total_months, segment_starts, segment_rates, monthly_terms)
+
+        with self._lock:
+            self._entries[key] = (monthly_terms, columns)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return columns
+
+    def _reuse_prefix(self, neighbours, key, total_months, segment_starts, segment_rates, monthly_terms):
+        principal, _, _, monthly_extra_payment, _ = key
+
+        # Find the cached schedule whose monthly terms agree with ours for the longest prefix
+        best_month, best_columns = 1, None
+        for cached_terms, cached_columns in neighbours:
+            differs = np.flatnonzero((cached_terms != monthly_terms).any(axis=0))
+            first_different_month = differs[0] + 1 if differs.size else total_months + 1
+            if first_different_month > best_month:
+                best_month, best_columns = first_different_month, cached_columns
+
+        # Restart at our last reset before the first differing month, from the cached balance
+        restart = np.searchsorted(segment_starts, best_month, side="right") - 1
+        prefix_months = segment_starts[restart] - 1
+        if prefix_months == 0:
+            return _amortize(principal, total_months, segment_starts, segment_rates, monthly_extra_payment)
+
+        with self._lock:
+            self.partial_hits += 1
+        if prefix_months >= best_columns["Month"].size:
+            return best_columns
+        tail = _amortize(
+            best_columns["Remaining Balance (€)"][prefix_months - 1], total_months,
+            segment_starts[restart:], segment_rates[restart:], monthly_extra_payment,
+            best_columns["Total Interest Paid (€)"][prefix_months - 1],
+        )
+        return {name: np.concatenate((best_columns[name][:prefix_months], tail[name])) for name in tail}
+
+    def stats(self):
+        """Hit/miss counters for debugging."""
+        return {"hits": self.hits, "misses": self.misses, "partial_hits": self.partial_hits,
+                "size": len(self._entries), "maxsize": self.maxsize}
+
+
+schedule_cache = ScheduleCache()
+
+
+def cached_loan_schedule(principal, annual_interest_rate, loan_term_years, monthly_extra_payment,
+                         rate_schedule=None):
+    """Same as calculate_loan_schedule, served from the process-wide schedule cache."""
+    columns = schedule_cache.get(principal, annual_interest_rate, loan_term_years, monthly_extra_payment, rate_schedule)
+    return pd.DataFrame(columns, columns=SCHEDULE_COLUMNS)
+
+
+# ------------------------------
+# Batch evaluation of loan books
+# ------------------------------
+LOAN_BOOK_COLUMNS = ["principal", "annual_interest_rate", "loan_term_years", "monthly_extra_payment"]
+
+
+def read_loan_book(path):
+    """Read a loan book from a CSV or Parquet file with LOAN_BOOK_COLUMNS."""
+    if str(path).endswith(".parquet"):
+        book = pd.read_parquet(path, columns=LOAN_BOOK_COLUMNS)
+    else:
+        book = pd.read_csv(path, usecols=LOAN_BOOK_COLUMNS)
+    return book[LOAN_BOOK_COLUMNS]
+
+
+def _schedule_grid(principal, annual_interest_rate, loan_term_years, monthly_extra_payment):
+    """Evaluate a chunk of loans on a (loans x months) grid with ragged payoff masked out."""
+    principal = np.asarray(principal, dtype=float)[:, None]
+    rate = monthly_rate(annual_interest_rate)[:, None]
+    total_months = (np.asarray(loan_term_years) * 12).astype(np.int64)[:, None]
+    extra = np.asarray(monthly_extra_payment, dtype=float)[:, None]
+
+    monthly_payment = annuity_payment(principal, rate, total_months)
+    months = np.arange(1, total_months.max(initial=0) + 1)[None, :]
+    balance = balance_after(principal, rate, monthly_payment + extra, months)
+
+    # Each loan stops at its first non-positive balance or at the end of its term
+    done = (balance <= PAID_OFF_BALANCE) | (months >= total_months)
+    payoff_month = np.argmax(done, axis=1) + 1
+    active = months <= payoff_month[:, None]
+
+    previous_balance = np.concatenate((principal, balance[:, :-1]), axis=1)
+    interest_payment = np.where(active, previous_balance * rate, 0.0)
+
+    return {
+        "active": active,
+        "payoff_month": payoff_month,
+        "monthly_payment": monthly_payment[:, 0] + extra[:, 0],
+        "principal_payment": monthly_payment - interest_payment + extra,
+        "interest_payment": interest_payment,
+        "balance": np.maximum(balance, 0.0),
+    }
+
+
+def _chunks(size, chunk_size):
+    for start in range(0, size, chunk_size):
+        yield slice(start, min(start + chunk_size, size))
+
+
+def evaluate_loan_portfolio(principal, annual_interest_rate, loan_term_years, monthly_extra_payment,
+                            chunk_size=4096):
+    """Summarize every loan of a book: payoff month, total interest and total paid."""
+    principal, annual_interest_rate, loan_term_years, monthly_extra_payment = np.broadcast_arrays(
+        principal, annual_interest_rate, loan_term_years, monthly_extra_payment
+    )
+    payoff_month = np.empty(principal.size, dtype=np.int64)
+    total_interest = np.empty(principal.size)
+    monthly_payment = np.empty(principal.size)
+
+    for chunk in _chunks(principal.size, chunk_size):
+        grid = _schedule_grid(
+            principal[chunk], annual_interest_rate[chunk], loan_term_years[chunk], monthly_extra_payment[chunk]
+        )
+        payoff_month[chunk] = grid["payoff_month"]
+        total_interest[chunk] = grid["interest_payment"].sum(axis=1)
+        monthly_payment[chunk] = grid["monthly_payment"]
+
+    return pd.DataFrame({
+        "Payoff Month": payoff_month,
+        "Monthly Payment (€)": monthly_payment,
+        "Total Interest Paid (€)": total_interest,
+        "Total Amount Paid (€)": payoff_month * monthly_payment,
+    })
+
+
+def iter_portfolio_schedules(principal, annual_interest_rate, loan_term_years, monthly_extra_payment,
+                             chunk_size=1024):
+    """Yield the full schedules of a loan book as long-format DataFrames, one chunk of loans at a time."""
+    principal, annual_interest_rate, loan_term_years, monthly_extra_payment = np.broadcast_arrays(
+        principal, annual_interest_rate, loan_term_years, monthly_extra_payment
+    )
+    for chunk in _chunks(principal.size, chunk_size):
+        grid = _schedule_grid(
+            principal[chunk], annual_interest_rate[chunk], loan_term_years[chunk], monthly_extra_payment[chunk]
+        )
+        loan, month = np.nonzero(grid["active"])
+        interest_payment = grid["interest_payment"]
+        yield pd.DataFrame({
+            "Loan": loan + chunk.start,
+            "Month": month + 1,
+            "Monthly Payment (€)": grid["monthly_payment"][loan],
+            "Principal Payment (€)": grid["principal_payment"][loan, month],
+            "Interest Payment (€)": interest_payment[loan, month],
+            "Remaining Balance (€)": grid["balance"][loan, month],
+            "Total Interest Paid (€)": np.cumsum(interest_payment, axis=1)[loan, month],
+        })
+
+
+# ----------------------
+# Payoff time goal seek
+# ----------------------
+def months_to_zero(principal, monthly_interest_rate, payment):
+    """Fractional number of level payments until the balance is repaid (logarithmic closed form)."""
+    principal = np.asarray(principal, dtype=float)
+    rate = np.asarray(monthly_interest_rate, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        months = np.log((payment - rate * PAID_OFF_BALANCE) / (payment - rate * principal)) / np.log1p(rate)
+        months = np.where(rate == 0, (principal - PAID_OFF_BALANCE) / payment, months)
+    return np.where(principal > PAID_OFF_BALANCE, months, 0.0)
+
+
+def payoff_time(principal, annual_interest_rate, loan_term_years, monthly_extra_payment):
+    """Fractional number of months until the loan is repaid."""
+    rate = monthly_rate(annual_interest_rate)
+    payment = annuity_payment(principal, rate, np.asarray(loan_term_years) * 12) + monthly_extra_payment
+    return months_to_zero(principal, rate, payment)
+
+
+def payoff_month(principal, annual_interest_rate, loan_term_years, monthly_extra_payment):
+    """Month of the last payment, as reported by calculate_loan_schedule."""
+    months = np.ceil(payoff_time(principal, annual_interest_rate, loan_term_years, monthly_extra_payment))
+    return np.clip(months, 1, np.asarray(loan_term_years) * 12).astype(np.int64)
+
+
+def required_extra_payment(principal, annual_interest_rate, loan_term_years, target_payoff_month):
+    """Smallest monthly extra payment (rounded up to the cent) that repays the loan by `target_payoff_month`.
+
+    The balance left after n payments is linear in the payment, so the payment
+    that leaves at most half a cent after the target month is an annuity on
+    the principal less that discounted half cent; no schedule is built.
+    """
+    principal, annual_interest_rate, loan_term_years, target_payoff_month = np.broadcast_arrays(
+        np.asarray(principal, dtype=float), annual_interest_rate, loan_term_years, target_payoff_month
+    )
+    total_months = loan_term_years * 12
+    target = np.clip(np.minimum(target_payoff_month, total_months), 1, None)
+    rate = monthly_rate(annual_interest_rate)
+
+    payment = annuity_payment(principal - PAID_OFF_BALANCE / (1 + rate) ** target, rate, target)
+    extra = payment - annuity_payment(principal, rate, total_months)
+    # Round up to the cent, ignoring float noise below a millionth of a cent, and add
+    # a cent in the rare case that noise left the rounded payment just short
+    extra = np.maximum(np.ceil(np.round(extra * 100, 6)) / 100, 0.0)
+    short = payoff_time(principal, annual_interest_rate, loan_term_years, extra) > target
+    extra = np.where(short, extra + 0.01, extra)
+    return np.where(target >= total_months, 0.0, extra)
+
+
+# ----------------------------------
+# Closed-form totals and sensitivity
+# ----------------------------------
+def loan_totals(principal, annual_interest_rate, total_months, monthly_extra_payment):
+    """Payment, payoff month, total interest and total paid without building a schedule.
+
+    All inputs broadcast, so whole grids of scenarios are evaluated in one pass.
+    Totals match the last row of calculate_loan_schedule.
+    """
+    principal = np.asarray(principal, dtype=float)
+    rate = monthly_rate(annual_interest_rate)
+    payment = annuity_payment(principal, rate, total_months) + monthly_extra_payment
+    last_month = np.clip(np.ceil(months_to_zero(principal, rate, payment)), 1, total_months)
+
+    # Interest is everything paid beyond the principal, less any overpayment in the last month
+    total_paid = last_month * payment
+    total_interest = total_paid - principal + balance_after(principal, rate, payment, last_month)
+    return {
+        "Monthly Payment (€)": payment,
+        "Payoff Month": last_month.astype(np.int64),
+        "Total Interest Paid (€)": total_interest,
+        "Total Amount Paid (€)": total_paid,
+    }
+
+
+def sensitivity_grid(principal, monthly_extra_payment, annual_interest_rates, loan_term_years):
+    """Loan totals over every (term, rate) pair, as 2-D arrays with one row per term."""
+    rates = np.asarray(annual_interest_rates, dtype=float)[None, :]
+    total_months = np.asarray(loan_term_years)[:, None] * 12
+    return loan_totals(principal, rates, total_months, monthly_extra_payment)
+
+
+# ---------------------
+# Refinance break-even
+# ---------------------
+def refinance_analysis(principal, annual_interest_rate, loan_term_years, monthly_extra_payment,
+                       candidate_rates, closing_costs):
+    """Savings and break-even of refinancing in every month at every candidate rate.
+
+    Refinancing after month m replaces the remaining balance with a new loan over
+    the remaining term, keeping the same extra payment. Results are 2-D arrays
+    with one row per refinance month and one column per candidate rate.
+    """
+    total_months = int(loan_term_years * 12)
+    current = loan_totals(principal, annual_interest_rate, total_months, monthly_extra_payment)
+    rate = monthly_rate(annual_interest_rate)
+
+    # Refinancing is possible after any month that still leaves a balance
+    months = np.arange(1, current["Payoff Month"])[:, None]
+    balance = balance_after(principal, rate, current["Monthly Payment (€)"], months)
+    interest_paid = months * current["Monthly Payment (€)"] - (principal - balance)
+    remaining_interest = current["Total Interest Paid (€)"] - interest_paid
+
+    candidate_rates = np.asarray(candidate_rates, dtype=float)[None, :]
+    closing_costs = np.asarray(closing_costs, dtype=float)[None, :]
+    refinanced = loan_totals(balance, candidate_rates, total_months - months, monthly_extra_payment)
+    interest_saved = remaining_interest - refinanced["Total Interest Paid (€)"]
+
+    # Break-even is reached once the lower payments have covered the closing costs,
+    # which never happens after the refinanced loan is repaid or when refinancing loses money
+    net_savings = interest_saved - closing_costs
+    payment_reduction = current["Monthly Payment (€)"] - refinanced["Monthly Payment (€)"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        break_even = months + np.ceil(closing_costs / payment_reduction)
+    reachable = (payment_reduction > 0) & (net_savings > 0) & (break_even <= months + refinanced["Payoff Month"])
+    break_even = np.where(reachable, break_even, np.nan)
+
+    return {
+        "Refinance Month": months[:, 0],
+        "New Monthly Payment (€)": refinanced["Monthly Payment (€)"],
+        "Interest Saved (€)": interest_saved,
+        "Net Savings (€)": net_savings,
+        "Break-even Month": break_even,
+    }
+
+
+# ----------------------------
+# Exact integer-cent schedules
+# ----------------------------
+RATE_SCALE = 10 ** 6  # annual rates are held as integer millionths of a percent
+MONTHLY_RATE_DIVISOR = 12 * 100 * RATE_SCALE
+
+
+def divide_half_even(numerator, denominator):
+    """Integer division of non-negative int64 arrays with banker's rounding."""
+    quotient, remainder = np.divmod(numerator, denominator)
+    twice_remainder = 2 * remainder
+    round_up = (twice_remainder > denominator) | ((twice_remainder == denominator) & (quotient % 2 == 1))
+    return quotient + round_up
+
+
+def _level_payment_cents(balance_cents, rate_units, remaining_months):
+    """Level payment in whole cents, rounded half-even as posted by the lender."""
+    payment = annuity_payment(balance_cents, rate_units / MONTHLY_RATE_DIVISOR, remaining_months)
+    return np.round(payment).astype(np.int64)
+
+
+def exact_amortization_cents(principal, annual_interest_rate, loan_term_years, monthly_extra_payment,
+                             rate_schedule=None):
+    """Amortize one or many loans on int64 cents, rounding every period's interest half-even.
+
+    Interest is posted as round_half_even(balance * rate / 12) each month and the
+    last payment settles the exact remaining balance, as lenders do. Inputs
+    broadcast and loans are advanced together, so the only Python loop is over
+    months. Returns (loans x months) int64 arrays plus each loan's payoff month.
+    """
+    principal, annual_interest_rate, loan_term_years, monthly_extra_payment = (
+        np.atleast_1d(column) for column in np.broadcast_arrays(
+            principal, annual_interest_rate, loan_term_years, monthly_extra_payment
+        )
+    )
+    total_months = (loan_term_years * 12).astype(np.int64)
+    initial_rate, resets = rate_resets(rate_schedule, total_months.max(initial=0))
+    if initial_rate is not None:
+        annual_interest_rate = np.full(annual_interest_rate.shape, initial_rate)
+    balance = np.round(principal * 100).astype(np.int64)
+    rate_units = np.round(annual_interest_rate * RATE_SCALE).astype(np.int64)
+    extra = np.round(monthly_extra_payment * 100).astype(np.int64)
+    resets = {month: round(rate * RATE_SCALE) for month, rate in resets.items()}
+
+    # Months are the outer axis while iterating so each month writes one contiguous row
+    shape = (total_months.max(initial=0), balance.size)
+    posted = np.zeros(shape, dtype=np.int64)
+    interest = np.zeros(shape, dtype=np.int64)
+    remaining = np.zeros(shape, dtype=np.int64)
+    payoff_month = total_months.copy()
+    active = total_months > 0
+    due = _level_payment_cents(balance, rate_units, total_months) + extra
+
+    for month in range(1, shape[0] + 1):
+        if not active.any():
+            break
+        if month in resets:
+            rate_units = np.where(active, resets[month], rate_units)
+            remaining_months = np.maximum(total_months - month + 1, 1)
+            due = np.where(active, _level_payment_cents(balance, rate_units, remaining_months) + extra, due)
+
+        month_interest = divide_half_even(balance * rate_units, MONTHLY_RATE_DIVISOR) * active
+        owed = balance + month_interest
+        final = active & ((owed <= due) | (month == total_months))
+        month_posted = np.where(final, owed, due) * active
+        balance = owed - month_posted
+
+        posted[month - 1] = month_posted
+        interest[month - 1] = month_interest
+        remaining[month - 1] = balance
+        payoff_month[final] = month
+        active &= ~final
+
+    return {
+        "payment": posted.T,
+        "principal": (posted - interest).T,
+        "interest": interest.T,
+        "balance": remaining.T,
+        "payoff_month": payoff_month,
+    }
+
+
+def exact_amortization_arrays(principal, annual_interest_rate, loan_term_years, monthly_extra_payment,
+                              rate_schedule=None):
+    """Schedule columns for one loan on integer cents, in euros.
+
+    Posts the same cents as exact_amortization_cents, but a single loan runs
+    on plain Python ints: per-month NumPy calls on length-1 arrays would cost
+    more than the arithmetic itself.
+    """
+    total_months = int(loan_term_years * 12)
+    initial_rate, resets = rate_resets(rate_schedule, total_months)
+    balance = round(principal * 100)
+    rate_units = round((annual_interest_rate if initial_rate is None else initial_rate) * RATE_SCALE)
+    extra = round(monthly_extra_payment * 100)
+    due = int(_level_payment_cents(balance, rate_units, total_months)) + extra
+
+    posted, interest, remaining = [], [], []
+    for month in range(1, total_months + 1):
+        if month in resets:
+            rate_units = round(resets[month] * RATE_SCALE)
+            due = int(_level_payment_cents(balance, rate_units, total_months - month + 1)) + extra
+
+        # round_half_even(balance * rate / 12) on exact integers
+        quotient, remainder = divmod(balance * rate_units, MONTHLY_RATE_DIVISOR)
+        month_interest = quotient + (2 * remainder > MONTHLY_RATE_DIVISOR
+                                     or (2 * remainder == MONTHLY_RATE_DIVISOR and quotient % 2 == 1))
+        owed = balance + month_interest
+        final = owed <= due or month == total_months
+        month_posted = owed if final else due
+        balance = owed - month_posted
+
+        posted.append(month_posted)
+        interest.append(month_interest)
+        remaining.append(balance)
+        if final:
+            break
+
+    posted, interest = np.array(posted, dtype=np.int64), np.array(interest, dtype=np.int64)
+    return {
+        "Month": np.arange(1, posted.size + 1),
+        "Monthly Payment (€)": posted / 100,
+        "Principal Payment (€)": (posted - interest) / 100,
+        "Interest Payment (€)": interest / 100,
+        "Remaining Balance (€)": np.array(remaining, dtype=np.int64) / 100,
+        "Total Interest Paid (€)": np.cumsum(interest) / 100,
+    }
+
+
+# ----------------------
+# Daily interest accrual
+# ----------------------
+DAY_COUNT_BASIS = {"actual/365": 365, "30/360": 360}
+
+
+def days_in_periods(total_months, day_count, start_date):
+    """Days in each monthly period as int32, following the day-count convention.
+
+    Actual periods are calendar months counted from the month of `start_date`.
+    """
+    if day_count == "30/360":
+        return np.full(total_months, 30, dtype=np.int32)
+    first_month = np.datetime64(start_date, "M")
+    period_starts = (first_month + np.arange(total_months + 1)).astype("datetime64[D]")
+    return np.diff(period_starts).astype(np.int32)
+
+
+def daily_accrual_schedule(principal, annual_interest_rate, loan_term_years, monthly_extra_payment, start_date,
+                           day_count="actual/365"):
+    """Repayment schedule with interest accrued daily and paid in monthly statements.
+
+    Interest accrues every day on the balance outstanding since the last
+    payment and is summed into each monthly statement; the first statement
+    covers the calendar month of `start_date`. The level payment is
+    solved so the loan amortizes exactly over the actual periods, and balances
+    use a cumulative-product closed form, so long terms stay as cheap as short ones.
+    """
+    if day_count not in DAY_COUNT_BASIS:
+        raise ValueError(f"Unknown day-count convention: {day_count}")
+    total_months = int(loan_term_years * 12)
+    days = days_in_periods(total_months, day_count, start_date)
+    daily_rate = annual_interest_rate / 100 / DAY_COUNT_BASIS[day_count]
+
+    # B_m = G_m * (P - X * sum(1 / G_j)) with G the cumulative growth of each period
+    growth = np.cumprod(1 + daily_rate * days)
+    discount = np.cumsum(1 / growth)
+    monthly_payment = principal / discount[-1]
+    balance = growth * (principal - (monthly_payment + monthly_extra_payment) * discount)
+
+    paid_off = np.flatnonzero(balance <= PAID_OFF_BALANCE)
+    if paid_off.size:
+        days, balance = days[:paid_off[0] + 1], balance[:paid_off[0] + 1]
+    previous_balance = np.concatenate(([principal], balance[:-1]))
+
+    # Accrue day by day on the balance since the last payment, then total per statement
+    period = np.repeat(np.arange(days.size, dtype=np.int32), days)
+    daily_interest = previous_balance[period] * daily_rate
+    period_starts = np.concatenate(([0], np.cumsum(days[:-1])))
+    interest_payment = np.add.reduceat(daily_interest, period_starts) if days.size else daily_interest
+
+    return pd.DataFrame({
+        "Month": np.arange(1, days.size + 1),
+        "Days in Period": days,
+        "Monthly Payment (€)": monthly_payment + monthly_extra_payment,
+        "Principal Payment (€)": monthly_payment + monthly_extra_payment - interest_payment,
+        "Interest Payment (€)": interest_payment,
+        "Remaining Balance (€)": np.maximum(balance, 0.0),
+        "Total Interest Paid (€)": np.cumsum(interest_payment),
+    })
+
+
+# ----------------------------
+# Offer comparison (APR / IRR)
+# ----------------------------
+OFFER_COLUMNS = ["Lender", "Loan Amount (€)", "Annual Interest Rate (%)", "Loan Term (Years)", "Fees (€)", "Points (%)"]
+
+
+def _annuity_value(monthly_irr, total_months):
+    """Present value of 1 per month for `total_months` months, and its derivative in the rate."""
+    rate = np.maximum(monthly_irr, 1e-12)
+    discount = np.exp(-total_months * np.log1p(rate))
+    value = -np.expm1(-total_months * np.log1p(rate)) / rate
+    slope = (total_months * discount / (1 + rate) - value) / rate
+    return value, slope
+
+
+def effective_apr(principal, annual_interest_rate, loan_term_years, fees, points):
+    """Effective APR in percent of each offer, solved for every offer at once.
+
+    The borrower receives the principal net of fees and points and repays the
+    level payment every month; the APR is twelve times the monthly IRR of
+    those cash flows.
+    """
+    principal = np.asarray(principal, dtype=float)
+    total_months = np.asarray(loan_term_years) * 12
+    payment = annuity_payment(principal, monthly_rate(annual_interest_rate), total_months)
+    net_proceeds = principal - np.asarray(fees, dtype=float) - principal * np.asarray(points, dtype=float) / 100
+
+    monthly_irr = newton_bisect(
+        lambda irr: payment * _annuity_value(irr, total_months)[0] - net_proceeds,
+        lambda irr: payment * _annuity_value(irr, total_months)[1],
+        np.zeros_like(payment), np.ones_like(payment), guess=monthly_rate(annual_interest_rate),
+    )
+
+    # Offers that cost nothing beyond the principal have a zero IRR at the edge of the bracket
+    monthly_irr = np.where(net_proceeds >= payment * total_months, 0.0, monthly_irr)
+    return monthly_irr * 12 * 100
+
+
+def compare_loan_offers(offers):
+    """Rank loan offers (a DataFrame with OFFER_COLUMNS) on APR and on total cost of borrowing."""
+    principal = offers["Loan Amount (€)"].to_numpy(dtype=float)
+    rate = offers["Annual Interest Rate (%)"].to_numpy(dtype=float)
+    total_months = offers["Loan Term (Years)"].to_numpy() * 12
+    fees = offers["Fees (€)"].to_numpy(dtype=float)
+    points = offers["Points (%)"].to_numpy(dtype=float)
+
+    payment = annuity_payment(principal, monthly_rate(rate), total_months)
+    comparison = offers.copy()
+    comparison["Monthly Payment (€)"] = payment
+    comparison["APR (%)"] = effective_apr(principal, rate, total_months / 12, fees, points)
+    comparison["Total Cost (€)"] = payment * total_months - principal + fees + principal * points / 100
+    comparison["APR Rank"] = comparison["APR (%)"].rank(method="min").astype(int)
+    comparison["Cost Rank"] = comparison["Total Cost (€)"].rank(method="min").astype(int)
+    return comparison.sort_values("APR Rank")
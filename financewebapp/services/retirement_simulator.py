@@ -1,45 +1,255 @@
+import math
+import os
+
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 
-def calculate_invested_savings(current_age, target_age, initial_savings, monthly_contribution, annual_lump_sum, annual_return, tax_rate):
-    """Calculate annual invested savings including monthly contributions and an annual lump sum."""
-    years_to_invest = target_age - current_age
-    total_months = years_to_invest * 12
-    monthly_rate = (annual_return * (1 - tax_rate / 100)) / 12 / 100
+from .compute_graph import ComputeGraph
+from .export import show_export
+from .retirement_engine import (
+    ACCOUNT_TYPES,
+    ASSET_CLASSES,
+    MAX_DRAWDOWN_YEARS,
+    PERCENTILE_BANDS,
+    PRODUCT_RETURN_MODELS,
+    TORNADO_INPUTS,
+    calculate_invested_savings,
+    calculate_non_invested_savings,
+    calculate_real_savings,
+    compare_products,
+    default_glide_path,
+    drawdown_balances,
+    glide_path_from_table,
+    glide_path_return_model,
+    glide_path_savings,
+    historical_mean_return,
+    historical_return_model,
+    multi_account_drawdown,
+    multi_account_savings,
+    required_contribution,
+    required_return,
+    safe_withdrawal_rate,
+    simulate_retirement,
+    tornado_analysis,
+    years_savings_last,
+    years_to_target,
+)
+
+TORNADO_LABELS = {
+    "annual_return": "Expected Return",
+    "inflation_rate": "Inflation Rate",
+    "tax_rate": "Tax Rate",
+    "monthly_contribution": "Monthly Contribution",
+    "annual_lump_sum": "Annual Lump Sum",
+    "target_age": "Retirement Age",
+}
+
+
+def build_retirement_graph():
+    """Dependency graph of the page's deterministic calculations; each node reruns only when its inputs change."""
+    graph = ComputeGraph()
+
+    @graph.node
+    def invested_savings(current_age, target_age, initial_savings, monthly_contribution, annual_lump_sum,
+                         annual_return, tax_rate, glide_path_model):
+        if glide_path_model is None:
+            return calculate_invested_savings(
+                current_age, target_age, initial_savings, monthly_contribution, annual_lump_sum, annual_return,
+                tax_rate,
+            )
+        return glide_path_savings(
+            initial_savings, monthly_contribution, annual_lump_sum,
+            glide_path_model["annual_returns"][:target_age - current_age], tax_rate,
+        )
+
+    @graph.node
+    def retirement_return(current_age, target_age, annual_return, glide_path_model):
+        if glide_path_model is None:
+            return annual_return
+        return glide_path_model["annual_returns"][target_age - current_age]
+
+    @graph.node
+    def non_invested_savings(current_age, target_age, initial_savings, monthly_contribution, annual_lump_sum):
+        return calculate_non_invested_savings(
+            current_age, target_age, initial_savings, monthly_contribution, annual_lump_sum
+        )
+
+    @graph.node
+    def real_savings(invested_savings, current_age, target_age, inflation_rate):
+        return calculate_real_savings(invested_savings, current_age, target_age, inflation_rate)
+
+    @graph.node
+    def first_withdrawal(current_age, target_age, monthly_expenses, inflation_rate):
+        return monthly_expenses * (1 + inflation_rate / 100) ** (target_age - current_age)
+
+    @graph.node
+    def years_savings_will_last(invested_savings, first_withdrawal, retirement_return, inflation_rate, tax_rate):
+        return float(years_savings_last(
+            invested_savings[-1], first_withdrawal, retirement_return, inflation_rate, tax_rate
+        ))
+
+    @graph.node
+    def retirement_balances(invested_savings, first_withdrawal, retirement_return, inflation_rate, tax_rate,
+                            target_age, end_age):
+        return drawdown_balances(
+            invested_savings[-1], first_withdrawal, retirement_return, inflation_rate, tax_rate,
+            (end_age - target_age) * 12,
+        )
+
+    @graph.node
+    def withdrawal_rate(invested_savings, retirement_return, inflation_rate, tax_rate, target_age, end_age):
+        return float(safe_withdrawal_rate(
+            invested_savings[-1], retirement_return, inflation_rate, tax_rate, end_age - target_age
+        ))
+
+    @graph.node
+    def tornado(current_age, target_age, initial_savings, monthly_contribution, annual_lump_sum, annual_return,
+                tax_rate, inflation_rate, monthly_expenses, change):
+        return tornado_analysis(
+            current_age, target_age, initial_savings, monthly_contribution, annual_lump_sum,
+            annual_return, tax_rate, inflation_rate, monthly_expenses, change,
+        )
+
+    return graph
+
+
+@st.cache_data(max_entries=32)
+def cached_retirement_simulation(current_age, target_age, end_age, initial_savings, monthly_contribution,
+                                 annual_lump_sum, annual_return, tax_rate, inflation_rate, monthly_expenses,
+                                 financial_product, paths, seed, _workers, historical_block_years=None,
+                                 glide_path_model=None):
+    """Monte Carlo simulation for the selected product, cached on its inputs.
+
+    The worker count is left out of the cache key (leading underscore), since
+    every worker count gives the same result. With `historical_block_years`
+    set, returns and inflation are bootstrapped from history; otherwise a
+    `glide_path_model` replaces the product's return model. The page passes
+    at most one of the two.
+    """
+    if historical_block_years is not None:
+        return_model = historical_return_model(financial_product, historical_block_years)
+    elif glide_path_model is not None:
+        return_model = glide_path_model
+    else:
+        return_model = PRODUCT_RETURN_MODELS[financial_product]
+    return simulate_retirement(
+        current_age, target_age, end_age, initial_savings, monthly_contribution, annual_lump_sum,
+        annual_return, tax_rate, inflation_rate, monthly_expenses, return_model,
+        paths=paths, seed=seed, workers=_workers,
+    )
 
-    invested_savings = [initial_savings]
 
-    for month in range(1, total_months + 1):
-        updated_savings = invested_savings[-1] * (1 + monthly_rate) + monthly_contribution
-        if month % 12 == 0:  # Add lump sum at the end of each year
-            updated_savings += annual_lump_sum
-        invested_savings.append(updated_savings)
+@st.cache_data(max_entries=32)
+def cached_product_comparison(current_age, target_age, end_age, initial_savings, monthly_contribution,
+                              annual_lump_sum, annual_returns, tax_rate, inflation_rate, monthly_expenses):
+    """All product projections in one batched pass, cached so toggling chart traces costs nothing."""
+    return compare_products(
+        current_age, target_age, end_age, initial_savings, monthly_contribution, annual_lump_sum,
+        annual_returns, tax_rate, inflation_rate, monthly_expenses,
+    )
 
-    # Keep only annual snapshots
-    invested_savings_annual = [invested_savings[i * 12] for i in range(years_to_invest + 1)]
-    return invested_savings_annual
 
+def create_comparison_chart(ages, names, comparison, shown):
+    """Create a plotly chart overlaying the invested savings of the shown products."""
+    fig = go.Figure()
+    for name, invested in zip(names, comparison["invested"]):
+        if name in shown:
+            fig.add_trace(go.Scatter(x=ages, y=invested, mode="lines", name=name))
+    fig.update_layout(
+        title="Invested Savings by Product",
+        xaxis_title="Age",
+        yaxis_title="€ Savings",
+        template="plotly_white",
+    )
+    return fig
 
-def calculate_non_invested_savings(current_age, target_age, initial_savings, monthly_contribution, annual_lump_sum):
-    """Calculate annual non-invested savings."""
-    years_to_invest = target_age - current_age
-    non_invested_savings = [initial_savings]
 
-    for year in range(1, years_to_invest + 1):
-        total = non_invested_savings[-1] + monthly_contribution * 12 + annual_lump_sum
-        non_invested_savings.append(total)
+def create_tornado_chart(base, outcomes, change, title, xaxis_title):
+    """Create a plotly tornado chart of low/high input outcomes around the base case, largest swing on top."""
+    order = np.argsort(np.abs(outcomes[:, 1] - outcomes[:, 0]))
+    labels = [TORNADO_LABELS[TORNADO_INPUTS[row]] for row in order]
+    fig = go.Figure()
+    for column, name, color in ((0, f"Input -{change}%", "indianred"), (1, f"Input +{change}%", "seagreen")):
+        fig.add_trace(go.Bar(
+            y=labels,
+            x=outcomes[order, column] - base,
+            base=base,
+            orientation="h",
+            name=name,
+            marker_color=color,
+        ))
+    fig.update_layout(
+        title=title,
+        xaxis_title=xaxis_title,
+        barmode="overlay",
+        template="plotly_white",
+    )
+    return fig
 
-    return non_invested_savings
 
+def create_account_chart(ages, balances, accounts):
+    """Create a plotly stacked area chart of the balance in each account by age."""
+    fig = go.Figure()
+    for account, column in zip(accounts, balances.T):
+        fig.add_trace(go.Scatter(x=ages, y=column, mode="lines", stackgroup="accounts", name=account))
+    fig.update_layout(
+        title="Savings by Account Type",
+        xaxis_title="Age",
+        yaxis_title="€ Savings",
+        template="plotly_white",
+    )
+    return fig
 
-def calculate_real_savings(invested_savings, current_age, target_age, inflation_rate):
-    """Calculate inflation-adjusted ('real') savings."""
-    real_savings = []
-    for idx, saving in enumerate(invested_savings):
-        real_value = saving / ((1 + inflation_rate / 100) ** idx)
-        real_savings.append(real_value)
-    return real_savings
+
+def create_glide_path_chart(ages, weights):
+    """Create a plotly stacked area chart of the glide path weights by age."""
+    fig = go.Figure()
+    for asset, column in zip(ASSET_CLASSES, weights.T):
+        fig.add_trace(go.Scatter(x=ages, y=column * 100, mode="lines", stackgroup="weights", name=asset))
+    fig.update_layout(
+        title="Glide Path Allocation",
+        xaxis_title="Age",
+        yaxis_title="% of Portfolio",
+        template="plotly_white",
+    )
+    return fig
+
+
+def create_percentile_chart(simulation):
+    """Create a plotly fan chart of the simulated percentile bands of real savings."""
+    ages = simulation["ages"]
+    bands = dict(zip(PERCENTILE_BANDS, simulation["percentiles"]))
+    fig = go.Figure()
+
+    for low, high, opacity in ((5, 95, 0.15), (25, 75, 0.3)):
+        fig.add_trace(go.Scatter(x=ages, y=bands[high], mode="lines", line=dict(width=0), showlegend=False))
+        fig.add_trace(go.Scatter(
+            x=ages,
+            y=bands[low],
+            mode="lines",
+            line=dict(width=0),
+            fill="tonexty",
+            fillcolor=f"rgba(128, 0, 128, {opacity})",
+            name=f"{low}th-{high}th Percentile",
+        ))
+
+    fig.add_trace(go.Scatter(
+        x=ages,
+        y=bands[50],
+        mode="lines",
+        name="Median",
+        line=dict(color="purple")
+    ))
+
+    fig.update_layout(
+        title="Simulated Real Savings (Today's €)",
+        xaxis_title="Age",
+        yaxis_title="€ Savings",
+        template="plotly_white"
+    )
+    return fig
 
 
 def show_retirement_simulation():
@@ -51,7 +261,7 @@ def show_retirement_simulation():
     st.markdown("""
     - **Taxes:** Taxes apply to annual investment returns.
     - **Inflation:** Adjusts savings for purchasing power.
-    - **Expenses:** Calculates how long savings last during retirement.
+    - **Expenses:** Withdrawn monthly during retirement and indexed to inflation, while the remaining savings stay invested.
     """)
 
     # --- Inputs ---
@@ -77,25 +287,75 @@ def show_retirement_simulation():
     inflation_rate = st.slider("Inflation Rate (% per year)", min_value=0.0, max_value=10.0, value=2.0)
     tax_rate = st.slider("Tax Rate on Investment Returns (%)", min_value=0.0, max_value=50.0, value=15.0)
     monthly_expenses = st.number_input("Estimated Monthly Retirement Expenses (€)", min_value=0.0, value=2000.0)
+    end_age = st.number_input("Plan Until Age", min_value=target_age + 1, max_value=110, value=max(95, target_age + 1))
 
     # Validation
     if current_age <= 0 or target_age <= 0 or initial_savings < 0 or monthly_contribution < 0:
         st.error("Invalid input! Please ensure all values are non-negative and logical.")
         return
 
+    # --- Glide Path ---
+    glide_path_model = None
+    if st.checkbox("Use an age-based glide path (de-risk towards retirement)"):
+        assets = st.data_editor(
+            pd.DataFrame({
+                "Asset": list(ASSET_CLASSES),
+                "Expected Return (%)": [asset["return"] for asset in ASSET_CLASSES.values()],
+                "Volatility (%)": [asset["volatility"] for asset in ASSET_CLASSES.values()],
+            }),
+            disabled=["Asset"],
+            hide_index=True,
+            key="glide_path_assets",
+        )
+        uploaded_glide_path = st.file_uploader(
+            "Upload Glide Path (CSV with Age, " + ", ".join(ASSET_CLASSES) + " columns in %)", type="csv"
+        )
+        if uploaded_glide_path:
+            try:
+                table = pd.read_csv(uploaded_glide_path, usecols=["Age", *ASSET_CLASSES]).apply(pd.to_numeric)
+                table = table.dropna()
+                weights = glide_path_from_table(table["Age"], table[list(ASSET_CLASSES)], current_age, end_age)
+            except ValueError as error:
+                st.error(f"Could not read the glide path file ({error}). Expected a CSV with numeric columns: "
+                         f"Age, {', '.join(ASSET_CLASSES)}.")
+                return
+        else:
+            initial_stocks = st.slider("Stocks at Current Age (%)", min_value=0, max_value=100, value=90)
+            retirement_stocks = st.slider("Stocks at Retirement (%)", min_value=0, max_value=100, value=40)
+            cash = st.slider("Cash (%)", min_value=0, max_value=100, value=5)
+            weights = default_glide_path(current_age, target_age, end_age, initial_stocks, retirement_stocks, cash)
+        glide_path_model = glide_path_return_model(
+            weights, assets["Expected Return (%)"], assets["Volatility (%)"]
+        )
+        st.plotly_chart(create_glide_path_chart(np.arange(current_age, end_age), weights))
+        st.caption("The glide path replaces the expected return above; retirement withdrawals earn "
+                   "the blended return at the retirement age.")
+
     # --- Calculations ---
-    invested_savings = calculate_invested_savings(
-        current_age, target_age, initial_savings, monthly_contribution, annual_lump_sum, annual_return, tax_rate
-    )
-    non_invested_savings = calculate_non_invested_savings(
-        current_age, target_age, initial_savings, monthly_contribution, annual_lump_sum
+    # The graph lives in the session, so a widget change only reruns the nodes downstream of it
+    if "retirement_graph" not in st.session_state:
+        st.session_state["retirement_graph"] = build_retirement_graph()
+    graph = st.session_state["retirement_graph"]
+    graph.set_inputs(
+        current_age=current_age, target_age=target_age, end_age=end_age, initial_savings=initial_savings,
+        monthly_contribution=monthly_contribution, annual_lump_sum=annual_lump_sum, annual_return=annual_return,
+        tax_rate=tax_rate, inflation_rate=inflation_rate, monthly_expenses=monthly_expenses,
+        glide_path_model=glide_path_model,
     )
-    real_savings = calculate_real_savings(invested_savings, current_age, target_age, inflation_rate)
+    invested_savings = graph["invested_savings"]
+    non_invested_savings = graph["non_invested_savings"]
+    real_savings = graph["real_savings"]
 
-    # Calculate how many years savings will last
+    # Calculate how many years savings will last, withdrawing expenses indexed to inflation
     total_savings_at_retirement = invested_savings[-1]
-    annual_expenses = monthly_expenses * 12
-    years_savings_will_last = total_savings_at_retirement / annual_expenses
+    first_withdrawal = graph["first_withdrawal"]
+    years_savings_will_last = graph["years_savings_will_last"]
+    if math.isinf(years_savings_will_last):
+        savings_duration = f"more than {MAX_DRAWDOWN_YEARS} years"
+    else:
+        savings_duration = f"{years_savings_will_last:.1f} years"
+    retirement_balances = graph["retirement_balances"]
+    withdrawal_rate = graph["withdrawal_rate"]
 
     # --- Visualization ---
     years_list = list(range(current_age, target_age + 1))
@@ -106,10 +366,19 @@ def show_retirement_simulation():
         x=years_list,
         y=invested_savings,
         mode='lines+markers',
-        name=f"Invested Savings (Lasts ~{years_savings_will_last:.1f} yrs)",
+        name=f"Invested Savings (Lasts {savings_duration})",
         line=dict(color='purple')
     ))
 
+    # Invested Savings During Retirement
+    fig.add_trace(go.Scatter(
+        x=list(range(target_age, end_age + 1)),
+        y=np.maximum(np.concatenate(([total_savings_at_retirement], retirement_balances[11::12])), 0),
+        mode='lines',
+        name="Savings During Retirement",
+        line=dict(color='purple', dash='dashdot')
+    ))
+
     # Non-Invested Savings
     fig.add_trace(go.Scatter(
         x=years_list,
@@ -146,13 +415,192 @@ def show_retirement_simulation():
     }
     df = pd.DataFrame(summary_data)
     st.dataframe(df.style.format("{:,.2f}"))
+    show_export(df, "retirement_summary", key="retirement")
 
     # --- Savings Duration ---
     st.subheader("How Long Will My Savings Last?")
     st.write(
-        f"Your savings will last approximately **{years_savings_will_last:.1f} years** "
-        f"after retirement, based on your estimated expenses of €{monthly_expenses:,.2f} per month."
+        f"Your savings will last approximately **{savings_duration}** after retirement, "
+        f"withdrawing €{monthly_expenses:,.2f} per month in today's money "
+        f"(€{first_withdrawal:,.2f} at age {target_age}) while the rest stays invested."
     )
+    st.write(
+        f"Safe withdrawal rate to last until age {end_age}: **{withdrawal_rate:.2f}%** of your savings "
+        f"in the first year (€{total_savings_at_retirement * withdrawal_rate / 100 / 12:,.2f} per month), "
+        f"indexed to inflation afterwards."
+    )
+
+    # --- Goal Seek ---
+    st.subheader("Goal Seek")
+    target_savings = st.number_input(
+        "Target Savings at Retirement (€)", min_value=0.0, value=1_000_000.0, step=50_000.0
+    )
+    solve_for = st.radio("Solve For", ["Monthly Contribution", "Expected Return", "Retirement Age"], horizontal=True)
+    if solve_for == "Monthly Contribution":
+        contribution = float(required_contribution(
+            current_age, target_age, initial_savings, annual_lump_sum, annual_return, tax_rate, target_savings
+        ))
+        st.write(f"Save **€{contribution:,.2f} per month** to reach €{target_savings:,.2f} by age {target_age}.")
+    elif solve_for == "Expected Return":
+        needed_return = float(required_return(
+            current_age, target_age, initial_savings, monthly_contribution, annual_lump_sum, tax_rate, target_savings
+        ))
+        if math.isnan(needed_return):
+            st.write("No annual return between -20% and 50% reaches this target by your retirement age.")
+        else:
+            st.write(f"You need an expected return of **{needed_return:.2f}% per year** "
+                     f"to reach €{target_savings:,.2f} by age {target_age}.")
+    else:
+        needed_years = float(years_to_target(
+            initial_savings, monthly_contribution, annual_lump_sum, annual_return, tax_rate, target_savings
+        ))
+        if math.isinf(needed_years):
+            st.write("Your savings never reach this target with the current contributions and return.")
+        else:
+            st.write(f"You reach €{target_savings:,.2f} at age **{current_age + needed_years:.1f}** "
+                     f"({needed_years:.1f} years from now).")
+    st.caption("Targets are in future euros. Goal seek uses the flat expected return rather than a glide path.")
+
+    # --- Sensitivity Analysis ---
+    st.subheader("Which Inputs Matter Most?")
+    change = st.slider("Change Each Input By (±%)", min_value=1, max_value=50, value=10)
+    graph.set_inputs(change=change)
+    tornado = graph["tornado"]
+    st.plotly_chart(create_tornado_chart(
+        tornado["base_real_savings"], tornado["real_savings"], change,
+        "Real Savings at Retirement", "€ Savings (Inflation Adjusted)",
+    ))
+    st.plotly_chart(create_tornado_chart(
+        tornado["base_years_last"], tornado["years_last"], change,
+        "How Long Savings Last", f"Years in Retirement (capped at {MAX_DRAWDOWN_YEARS})",
+    ))
+    if glide_path_model is not None:
+        st.caption("Sensitivities use the flat expected return above rather than the glide path.")
+
+    # --- Product Comparison ---
+    st.subheader("Compare Financial Products")
+    if st.checkbox("Compare all products side by side"):
+        st.write("Add custom expected returns to compare alongside the products:")
+        custom_returns = st.data_editor(
+            pd.DataFrame({"Name": ["Custom"], "Annual Return (%)": [8.0]}),
+            num_rows="dynamic",
+            key="custom_returns",
+        ).dropna()
+        scenarios = dict(product_return_estimates)
+        scenarios.update(zip(custom_returns["Name"], custom_returns["Annual Return (%)"]))
+        comparison = cached_product_comparison(
+            current_age, target_age, end_age, initial_savings, monthly_contribution, annual_lump_sum,
+            tuple(scenarios.values()), tax_rate, inflation_rate, monthly_expenses,
+        )
+        shown = st.multiselect("Show in Chart", list(scenarios), default=list(scenarios))
+        st.plotly_chart(create_comparison_chart(years_list, list(scenarios), comparison, shown))
+
+        years_last = comparison["years_last"]
+        st.dataframe(pd.DataFrame({
+            "Product": list(scenarios),
+            "Annual Return (%)": list(scenarios.values()),
+            "Savings at Retirement (€)": comparison["invested"][:, -1],
+            "Real Savings at Retirement (€)": comparison["real"][:, -1],
+            "Savings Last (Years)": np.where(np.isinf(years_last), np.nan, years_last),
+            f"Safe Withdrawal Rate to Age {end_age} (%)": comparison["safe_withdrawal_rate"],
+        }).style.format(precision=2, thousands=",", na_rep=f"> {MAX_DRAWDOWN_YEARS}"), hide_index=True)
+
+    # --- Account Types ---
+    st.subheader("Account Types")
+    if st.checkbox("Split savings across taxable, tax-deferred and tax-free accounts"):
+        st.write("Contributions fill each account's annual cap from top to bottom; leave a cap empty for no limit.")
+        accounts = st.data_editor(
+            pd.DataFrame({
+                "Account": list(ACCOUNT_TYPES),
+                "Initial Balance (€)": [0.0] * (len(ACCOUNT_TYPES) - 1) + [initial_savings],
+                "Annual Cap (€)": [account["annual_cap"] for account in ACCOUNT_TYPES.values()],
+                "Tax on Returns (%)": [
+                    account["tax_on_returns"] for account in ACCOUNT_TYPES.values()
+                ][:-1] + [tax_rate],
+                "Tax on Withdrawals (%)": [account["tax_on_withdrawals"] for account in ACCOUNT_TYPES.values()],
+            }),
+            column_config={
+                "Tax on Returns (%)": st.column_config.NumberColumn(min_value=0.0, max_value=100.0),
+                "Tax on Withdrawals (%)": st.column_config.NumberColumn(min_value=0.0, max_value=99.0),
+            },
+            num_rows="dynamic",
+            hide_index=True,
+            key="accounts",
+        )
+        accounts = accounts.dropna(subset=["Account"]).drop_duplicates("Account").fillna({
+            "Initial Balance (€)": 0.0, "Annual Cap (€)": np.inf, "Tax on Returns (%)": 0.0,
+            "Tax on Withdrawals (%)": 0.0,
+        })
+        names = list(accounts["Account"])
+        withdrawal_order = st.multiselect(
+            "Withdrawal Order in Retirement (first to last; others follow in table order)", names,
+            default=[name for name in ("Taxable", "Tax-Deferred", "Tax-Free") if name in names],
+        )
+        order = [names.index(name) for name in withdrawal_order]
+        order += [index for index in range(len(names)) if index not in order]
+
+        if names:
+            return_taxes = accounts["Tax on Returns (%)"].to_numpy(dtype=float)
+            account_balances = multi_account_savings(
+                current_age, target_age, accounts["Initial Balance (€)"], monthly_contribution, annual_lump_sum,
+                annual_return, return_taxes, accounts["Annual Cap (€)"],
+            )
+            account_paths, account_years_last = multi_account_drawdown(
+                account_balances[-1], first_withdrawal, annual_return, return_taxes,
+                accounts["Tax on Withdrawals (%)"].to_numpy(dtype=float), inflation_rate, order,
+            )
+            yearly_paths = account_paths[11:(end_age - target_age) * 12:12]
+            st.plotly_chart(create_account_chart(
+                np.arange(current_age, end_age + 1), np.vstack([account_balances, yearly_paths]), names
+            ))
+            if math.isinf(account_years_last):
+                account_duration = f"more than {MAX_DRAWDOWN_YEARS} years"
+            else:
+                account_duration = f"{account_years_last:.1f} years"
+            st.write(
+                f"Across your accounts you would have **€{account_balances[-1].sum():,.2f}** at age {target_age}, "
+                f"lasting **{account_duration}** after taxes on withdrawals (single account: {savings_duration})."
+            )
+            if glide_path_model is not None:
+                st.caption("Accounts use the flat expected return above rather than the glide path.")
+
+    # --- Monte Carlo Simulation ---
+    st.subheader("Monte Carlo Simulation")
+    if st.checkbox("Simulate market and inflation uncertainty"):
+        paths = st.select_slider("Simulated Paths", options=[10_000, 50_000, 100_000, 250_000], value=100_000)
+        seed = st.number_input("Random Seed", min_value=0, value=42)
+        workers = st.number_input("Worker Processes", min_value=1, max_value=os.cpu_count() or 1, value=1)
+
+        historical_block_years = None
+        if historical_return_model(financial_product) is None:
+            st.caption(f"No historical series for {financial_product}; returns are drawn from a fitted distribution.")
+        else:
+            # A configured glide path stays in charge unless historical returns are picked explicitly
+            return_models = ["Historical (block bootstrap)",
+                             "Fitted distribution" if glide_path_model is None else "Glide path"]
+            if st.radio("Return Model", return_models, index=int(glide_path_model is not None)) == return_models[0]:
+                historical_block_years = st.slider("Years per Historical Block", min_value=1, max_value=10, value=5)
+                st.caption(f"Returns and inflation replay runs of consecutive historical years, in which "
+                           f"{financial_product} averaged {historical_mean_return(financial_product):.1f}% a year "
+                           f"before inflation, ignoring the expected return and inflation inputs above.")
+                if glide_path_model is not None:
+                    st.caption("The glide path is ignored in historical mode, since there is no historical series "
+                               "for its bond allocation.")
+
+        simulation = cached_retirement_simulation(
+            current_age, target_age, end_age, initial_savings, monthly_contribution, annual_lump_sum,
+            annual_return, tax_rate, inflation_rate, monthly_expenses, financial_product, paths, seed, workers,
+            historical_block_years, glide_path_model if historical_block_years is None else None,
+        )
+        st.plotly_chart(create_percentile_chart(simulation))
+        st.write(
+            f"Probability that your savings last until age {end_age}: "
+            f"**{simulation['success_probability']:.1%}**, withdrawing €{monthly_expenses:,.2f} per month "
+            f"in today's money from age {target_age}."
+        )
+
+    with st.expander("Calculation Graph Statistics"):
+        st.dataframe(pd.DataFrame(graph.stats()).T)
 
     # --- Disclaimer ---
     st.write("---")
@@ -2,7 +2,7 @@ import streamlit as st
 from financewebapp.services.landing_page import show_landing_page
 from financewebapp.services.finance_pro_planner import show_finance_pro_planner
 from financewebapp.services.retirement_simulator import show_retirement_simulation
-from financewebapp.services.loan_simulator import show_loan_simulation
+from financewebapp.services.loan_simulator import show_loan_comparison, show_loan_simulation
 from financewebapp.services.financial_chatbot import show_financial_chatbot
 
 # Custom styles for the light theme
@@ -49,7 +49,7 @@ def main():
         # Wrap services in a dropdown menu
         service_option = st.sidebar.selectbox(
             "Select a Financial Service", 
-            ["FinancePro Planner", "Retirement Simulator", "Loan Simulator", "Financial Chatbot"]
+            ["FinancePro Planner", "Retirement Simulator", "Loan Simulator", "Loan Comparison", "Financial Chatbot"]
         )
         if service_option == "FinancePro Planner":
             show_finance_pro_planner()
@@ -57,6 +57,8 @@ def main():
             show_retirement_simulation()
         elif service_option == "Loan Simulator":
             show_loan_simulation()
+        elif service_option == "Loan Comparison":
+            show_loan_comparison()
         elif service_option == "Financial Chatbot":
             show_financial_chatbot()
     elif option == "About Us":
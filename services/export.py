@@ -0,0 +1,71 @@
+"""In-memory table exports shared by the pages.
+
+Files are written to a BytesIO instead of the working directory, so
+concurrent sessions never race on a file, and they are only built when the
+user asks for a download.
+"""
+import hashlib
+import io
+
+import streamlit as st
+import pandas as pd
+import pyarrow as pa
+
+# Label -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Arrow IPC": ("arrow", "application/vnd.apache.arrow.file"),
+}
+
+
+def dataframe_to_bytes(df, file_format, sheet_name="Summary"):
+    """Serialize `df` in one of EXPORT_FORMATS without touching the disk."""
+    buffer = io.BytesIO()
+    if file_format == "Excel":
+        with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+            df.to_excel(writer, index=False, sheet_name=sheet_name)
+    elif file_format == "CSV":
+        df.to_csv(buffer, index=False)
+    elif file_format == "Parquet":
+        df.to_parquet(buffer, index=False)
+    elif file_format == "Arrow IPC":
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.ipc.new_file(buffer, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        raise ValueError(f"Unknown export format: {file_format}")
+    return buffer.getvalue()
+
+
+def content_hash(df):
+    """Hash of a table's columns and values, used as its export cache key."""
+    digest = hashlib.sha256(repr(list(df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+@st.cache_data(max_entries=64)
+def cached_export(df_hash, file_format, _df):
+    """Export bytes cached per (content hash, format), so repeat downloads cost nothing."""
+    return dataframe_to_bytes(_df, file_format)
+
+
+def show_export(df, file_name, key):
+    """Format picker and download button for `df`; the file is only built once the user asks for it."""
+    file_format = st.selectbox("Export Format", list(EXPORT_FORMATS), key=f"{key}_export_format")
+    df_hash = content_hash(df)
+    if st.button("Prepare Download", key=f"{key}_export_prepare"):
+        st.session_state[f"{key}_export_ready"] = (df_hash, file_format)
+
+    # Changing the inputs or the format withdraws the prepared file until it is requested again
+    if st.session_state.get(f"{key}_export_ready") == (df_hash, file_format):
+        extension, mime = EXPORT_FORMATS[file_format]
+        st.download_button(
+            label=f"Download {file_format}",
+            data=cached_export(df_hash, file_format, df),
+            file_name=f"{file_name}.{extension}",
+            mime=mime,
+            key=f"{key}_export_download",
+        )
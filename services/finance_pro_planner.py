@@ -1,15 +1,35 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 
+from .export import show_export
+from .planner_engine import (
+    NET_WORTH_SCENARIOS,
+    months_to_target,
+    planner_cash_flows,
+    rent_vs_buy_grid,
+    required_investment_rate,
+    required_monthly_savings,
+    simulate_planner,
+    year_end,
+    yearly_totals,
+)
+from .retirement_engine import PERCENTILE_BANDS
 
-def create_line_chart(years, investment_value, property_value, benchmark=None):
+SWEEP_INVESTMENT_RATES = np.round(np.arange(0, 41) * 0.25, 2)
+SWEEP_PROPERTY_GROWTHS = np.round(np.arange(0, 25) * 0.25, 2)
+SWEEP_MORTGAGE_RATES = np.round(np.arange(1, 13) * 0.5, 1)
+SWEEP_HOLDING_YEARS = np.arange(5, 35, 5)
+
+
+def create_line_chart(years, investment_value, property_value, benchmark=None, buy_net_worth=None):
     fig = go.Figure()
     fig.add_trace(go.Scatter(
         x=years,
         y=investment_value,
         mode='lines+markers',
-        name='Investment Value',
+        name='Investment Value (Rent & Invest)',
         line=dict(color='blue')
     ))
     fig.add_trace(go.Scatter(
@@ -20,7 +40,16 @@ def create_line_chart(years, investment_value, property_value, benchmark=None):
         line=dict(color='green')
     ))
 
-    if benchmark:
+    if buy_net_worth is not None:
+        fig.add_trace(go.Scatter(
+            x=years,
+            y=buy_net_worth,
+            mode='lines+markers',
+            name='Net Worth (Buy)',
+            line=dict(color='orange')
+        ))
+
+    if benchmark is not None:
         fig.add_trace(go.Scatter(
             x=years,
             y=benchmark,
@@ -51,14 +80,112 @@ def create_line_chart(years, investment_value, property_value, benchmark=None):
     return fig
 
 
+@st.cache_data(max_entries=16)
+def cached_rent_vs_buy_grid(initial_capital, monthly_savings, property_price, down_payment, mortgage_years,
+                            monthly_rent, inflation_rate):
+    """Rent-vs-buy sweep over the SWEEP_* axes, cached per capital and price inputs."""
+    return rent_vs_buy_grid(
+        initial_capital, monthly_savings, property_price, down_payment, mortgage_years, monthly_rent,
+        inflation_rate, SWEEP_INVESTMENT_RATES, SWEEP_PROPERTY_GROWTHS, SWEEP_MORTGAGE_RATES, SWEEP_HOLDING_YEARS,
+    )
+
+
+@st.cache_data(max_entries=16)
+def cached_planner_simulation(initial_capital, monthly_savings, investment_rate, property_price, property_growth,
+                              mortgage_rate, mortgage_years, down_payment, monthly_rent, inflation_rate, years,
+                              investment_volatility, property_volatility, correlation, paths, seed):
+    """Correlated investment/property Monte Carlo, cached on all of its inputs."""
+    return simulate_planner(
+        initial_capital, monthly_savings, investment_rate, property_price, property_growth, mortgage_rate,
+        mortgage_years, down_payment, monthly_rent, inflation_rate, years,
+        investment_volatility, property_volatility, correlation, paths=paths, seed=seed,
+    )
+
+
+def create_fan_chart(simulation):
+    """Create a plotly chart of the percentile fans of the investment portfolio and the property value."""
+    fig = go.Figure()
+    for key, name, color in (
+        ("investment_percentiles", "Investment Value (Rent & Invest)", "0, 0, 255"),
+        ("property_percentiles", "Property Value", "0, 128, 0"),
+    ):
+        bands = dict(zip(PERCENTILE_BANDS, simulation[key]))
+        for low, high, opacity in ((5, 95, 0.15), (25, 75, 0.3)):
+            fig.add_trace(go.Scatter(
+                x=simulation["years"], y=bands[high], mode="lines", line=dict(width=0), showlegend=False
+            ))
+            fig.add_trace(go.Scatter(
+                x=simulation["years"],
+                y=bands[low],
+                mode="lines",
+                line=dict(width=0),
+                fill="tonexty",
+                fillcolor=f"rgba({color}, {opacity})",
+                name=f"{name} {low}th-{high}th Percentile",
+            ))
+        fig.add_trace(go.Scatter(
+            x=simulation["years"], y=bands[50], mode="lines", line=dict(color=f"rgb({color})"),
+            name=f"{name} (Median)",
+        ))
+
+    fig.update_layout(
+        title="Simulated Investment and Property Value",
+        xaxis_title="Years",
+        yaxis_title="Value (€)",
+        template="plotly_white",
+    )
+    return fig
+
+
+def create_break_even_chart(advantage, investment_rate, property_growth):
+    """Create a plotly contour chart of buying minus renting over investment rate and property growth."""
+    limit = np.abs(advantage).max()
+    fig = go.Figure(go.Contour(
+        x=SWEEP_INVESTMENT_RATES,
+        y=SWEEP_PROPERTY_GROWTHS,
+        z=advantage.T,
+        colorscale="RdBu",
+        zmin=-limit,
+        zmax=limit,
+        colorbar=dict(title="€"),
+        hovertemplate="Investment: %{x:.2f}%<br>Property: %{y:.2f}%<br>Buy - Rent: €%{z:,.0f}<extra></extra>",
+    ))
+    fig.add_trace(go.Contour(
+        x=SWEEP_INVESTMENT_RATES,
+        y=SWEEP_PROPERTY_GROWTHS,
+        z=advantage.T,
+        contours=dict(start=0, end=0, coloring="lines", showlabels=True),
+        line=dict(width=3, color="black"),
+        showscale=False,
+        hoverinfo="skip",
+        name="Break-Even",
+    ))
+    fig.add_trace(go.Scatter(
+        x=[investment_rate],
+        y=[property_growth],
+        mode="markers",
+        marker=dict(size=12, color="purple", symbol="x"),
+        name="Your Assumptions",
+    ))
+    fig.update_layout(
+        title="Buying Minus Renting: Break-Even Region",
+        xaxis_title="Investment Rate (% per year)",
+        yaxis_title="Property Growth Rate (% per year)",
+        template="plotly_white",
+    )
+    return fig
+
+
 def show_finance_pro_planner():
     st.title("FinancePro Planner")
     st.write("Plan and visualize your financial growth with interactive tools and insights.")
     
     # **Formulas in LaTeX**
     st.subheader("Formulas Used")
-    st.latex(r"Investment\ Value = Initial\ Capital \cdot (1 + Investment\ Rate)^{Years}")
+    st.latex(r"Investment_{m} = Investment_{m-1} \cdot (1 + Investment\ Rate)^{1/12} + Savings - Rent_{m}")
     st.latex(r"Property\ Value = Property\ Price \cdot (1 + Property\ Growth\ Rate)^{Years}")
+    st.latex(r"Equity = Property\ Value - Mortgage\ Balance")
+    st.latex(r"Net\ Worth_{Buy} = Investment_{Buy} + Equity")
     st.latex(r"Inflation\ Adjusted\ Value = Initial\ Value \cdot (1 + Inflation\ Rate)^{Years}")
     
     # **User Inputs**
@@ -66,38 +193,129 @@ def show_finance_pro_planner():
     monthly_savings = st.number_input("Monthly Savings (€)", min_value=0, value=600)
     investment_rate = st.slider("Investment Rate (% per year)", min_value=0.0, max_value=10.0, value=4.0)
     property_price = st.number_input("Property Price (€)", min_value=0, value=350000)
+    property_growth = st.slider("Property Growth Rate (% per year)", min_value=0.0, max_value=10.0, value=2.0)
+    down_payment = st.slider("Down Payment (% of price)", min_value=0, max_value=100, value=20)
     mortgage_rate = st.slider("Mortgage Rate (% per year)", min_value=0.0, max_value=10.0, value=2.5)
+    mortgage_years = st.slider("Mortgage Term (Years)", min_value=5, max_value=40, value=25)
+    monthly_rent = st.number_input("Monthly Rent if Not Buying (€)", min_value=0, value=900)
     years = st.slider("Years to Simulate", min_value=5, max_value=50, value=30)
     inflation_rate = st.slider("Inflation Rate (% per year)", min_value=0.0, max_value=5.0, value=2.0)
+    st.caption("Monthly savings pay the mortgage or the rent (indexed to inflation); whatever is left is invested.")
+
+    if property_price * down_payment / 100 > initial_capital:
+        st.warning("The down payment exceeds your initial capital; the shortfall is drawn from investments.")
 
+    # **Monthly Cash Flows**
+    flows = planner_cash_flows(
+        initial_capital, monthly_savings, investment_rate, property_price, property_growth, mortgage_rate,
+        mortgage_years, down_payment, monthly_rent, inflation_rate, years,
+    )
     years_range = list(range(1, years + 1))
-    investment_value = [initial_capital * (1 + investment_rate / 100) ** year for year in years_range]
-    property_value = [property_price * (1 + 2.0 / 100) ** year for year in years_range]
-    benchmark = [initial_capital * (1 + inflation_rate / 100) ** year for year in years_range]
+    investment_value = year_end(flows["rent_net_worth"])
+    property_value = year_end(flows["property_value"])
+    buy_net_worth = year_end(flows["buy_net_worth"])
+    benchmark = initial_capital * (1 + inflation_rate / 100) ** np.arange(1, years + 1)
 
     # **Visualization**
-    st.plotly_chart(create_line_chart(years_range, investment_value, property_value, benchmark))
+    st.plotly_chart(create_line_chart(years_range, investment_value, property_value, benchmark, buy_net_worth))
 
     # **Summary Table**
     summary_data = {
         "Years": years_range,
         "Investment Value (€)": investment_value,
         "Property Value (€)": property_value,
+        "Mortgage Balance (€)": year_end(flows["mortgage_balance"]),
+        "Home Equity (€)": year_end(flows["equity"]),
+        "Investments if Buying (€)": year_end(flows["buy_investments"]),
+        "Net Worth if Buying (€)": buy_net_worth,
+        "Mortgage Interest Paid (€)": yearly_totals(flows["mortgage_interest"]),
+        "Rent Paid (€)": yearly_totals(flows["rent"]),
         "Benchmark Value (€)": benchmark,
     }
     df = pd.DataFrame(summary_data)
     st.dataframe(df.style.format("{:,.2f}"))
 
-    # **Download in Excel**
-    buffer = pd.ExcelWriter("summary.xlsx", engine="xlsxwriter")
-    df.to_excel(buffer, index=False, sheet_name="Summary")
-    buffer.close()
-    st.download_button(
-        label=["download_excel"],
-        data=open("summary.xlsx", "rb").read(),
-        file_name="financial_summary.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    # **Goal Seek**
+    st.subheader("Goal Seek")
+    target_net_worth = st.number_input("Target Net Worth (€)", min_value=0, value=1000000, step=50000)
+    scenario = st.radio("Scenario", list(NET_WORTH_SCENARIOS), horizontal=True)
+    solve_for = st.radio("Solve For", ["Monthly Savings", "Investment Rate", "Years"], horizontal=True)
+    housing_inputs = dict(
+        property_price=property_price, property_growth=property_growth, mortgage_rate=mortgage_rate,
+        mortgage_years=mortgage_years, down_payment=down_payment, monthly_rent=monthly_rent,
+        rent_growth=inflation_rate,
     )
+    if solve_for == "Monthly Savings":
+        needed_savings = float(required_monthly_savings(
+            target_net_worth, scenario, initial_capital, investment_rate, years=years, **housing_inputs
+        ))
+        st.write(f"Save **€{needed_savings:,.2f} per month** to reach €{target_net_worth:,.2f} in {years} years.")
+    elif solve_for == "Investment Rate":
+        needed_rate = float(required_investment_rate(
+            target_net_worth, scenario, initial_capital, monthly_savings, years=years, **housing_inputs
+        ))
+        if np.isnan(needed_rate):
+            st.write("No investment rate between -20% and 50% reaches this target in time.")
+        else:
+            st.write(f"You need an investment rate of **{needed_rate:.2f}% per year** "
+                     f"to reach €{target_net_worth:,.2f} in {years} years.")
+    else:
+        needed_months = float(months_to_target(
+            target_net_worth, scenario, initial_capital, monthly_savings, investment_rate, **housing_inputs
+        ))
+        if np.isinf(needed_months):
+            st.write("Your net worth does not reach this target within 100 years.")
+        else:
+            st.write(f"You reach €{target_net_worth:,.2f} after **{int(needed_months) // 12} years and "
+                     f"{int(needed_months) % 12} months**.")
+
+    # **Rent vs Buy Sweep**
+    st.subheader("Rent or Buy?")
+    if st.checkbox("Sweep investment, property growth and mortgage rates and holding periods"):
+        grid = cached_rent_vs_buy_grid(
+            initial_capital, monthly_savings, property_price, down_payment, mortgage_years, monthly_rent,
+            inflation_rate,
+        )
+        chart_mortgage_rate = st.select_slider(
+            "Mortgage Rate Shown (%)", options=list(SWEEP_MORTGAGE_RATES),
+            value=SWEEP_MORTGAGE_RATES[np.abs(SWEEP_MORTGAGE_RATES - mortgage_rate).argmin()],
+        )
+        holding_years = st.select_slider(
+            "Holding Period Shown (Years)", options=list(SWEEP_HOLDING_YEARS),
+            value=SWEEP_HOLDING_YEARS[np.abs(SWEEP_HOLDING_YEARS - years).argmin()],
+        )
+        advantage = grid[:, :, list(SWEEP_MORTGAGE_RATES).index(chart_mortgage_rate),
+                         list(SWEEP_HOLDING_YEARS).index(holding_years)]
+        st.plotly_chart(create_break_even_chart(advantage, investment_rate, property_growth))
+        st.write(
+            f"Buying comes out ahead in **{(grid > 0).mean():.1%}** of all {grid.size:,} combinations swept, "
+            f"and in **{(advantage > 0).mean():.1%}** of those shown above. Blue areas favour buying, red areas "
+            f"favour renting and investing the difference."
+        )
+
+    # **Stochastic Mode**
+    st.subheader("Market Uncertainty")
+    if st.checkbox("Simulate correlated investment and property returns"):
+        investment_volatility = st.slider(
+            "Investment Volatility (% per year)", min_value=0.0, max_value=40.0, value=15.0
+        )
+        property_volatility = st.slider("Property Volatility (% per year)", min_value=0.0, max_value=20.0, value=5.0)
+        correlation = st.slider("Investment/Property Correlation", min_value=-1.0, max_value=1.0, value=0.3)
+        paths = st.select_slider("Simulated Paths", options=[10_000, 50_000, 100_000], value=50_000)
+        seed = st.number_input("Random Seed", min_value=0, value=42)
+        simulation = cached_planner_simulation(
+            initial_capital, monthly_savings, investment_rate, property_price, property_growth, mortgage_rate,
+            mortgage_years, down_payment, monthly_rent, inflation_rate, years,
+            investment_volatility, property_volatility, correlation, paths, seed,
+        )
+        st.plotly_chart(create_fan_chart(simulation))
+        st.write(
+            f"Probability that renting and investing beats buying after {years} years: "
+            f"**{simulation['invest_beats_buy'][-1]:.1%}**."
+        )
+
+    # **Download**
+    show_export(df, "financial_summary", key="planner")
     
     # **Legal Disclaimer**
     st.write("---")
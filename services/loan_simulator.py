@@ -1,43 +1,35 @@
+import datetime
+
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 
+from .export import show_export
+from .loan_engine import (
+    OFFER_COLUMNS,
+    cached_loan_schedule,
+    calculate_loan_schedule,
+    compare_loan_offers,
+    daily_accrual_schedule,
+    payoff_month,
+    refinance_analysis,
+    required_extra_payment,
+    schedule_cache,
+    sensitivity_grid,
+)
 
-def calculate_loan_schedule(principal, annual_interest_rate, loan_term_years, monthly_extra_payment):
-    """Calculate loan repayment schedule."""
-    monthly_interest_rate = annual_interest_rate / 12 / 100
-    total_months = loan_term_years * 12
-
-    # Monthly payment calculation (Fixed Payment)
-    monthly_payment = principal * (monthly_interest_rate * (1 + monthly_interest_rate) ** total_months) / (
-            (1 + monthly_interest_rate) ** total_months - 1)
-
-    schedule = []
-    remaining_balance = principal
-    total_interest_paid = 0
-
-    for month in range(1, total_months + 1):
-        interest_payment = remaining_balance * monthly_interest_rate
-        principal_payment = monthly_payment - interest_payment
-        total_interest_paid += interest_payment
-        remaining_balance -= principal_payment + monthly_extra_payment
-
-        if remaining_balance < 0:
-            remaining_balance = 0
-
-        schedule.append({
-            "Month": month,
-            "Monthly Payment (€)": monthly_payment + monthly_extra_payment,
-            "Principal Payment (€)": principal_payment + monthly_extra_payment,
-            "Interest Payment (€)": interest_payment,
-            "Remaining Balance (€)": remaining_balance,
-            "Total Interest Paid (€)": total_interest_paid
-        })
-
-        if remaining_balance == 0:
-            break
-
-    return pd.DataFrame(schedule)
+SENSITIVITY_RATES = np.round(np.arange(0, 201) * 0.1, 1)
+SENSITIVITY_TERMS = np.arange(1, 31)
+DEFAULT_OFFERS = pd.DataFrame({
+    "Lender": ["Bank A", "Bank B", "Bank C"],
+    "Loan Amount (€)": [100000.0, 100000.0, 100000.0],
+    "Annual Interest Rate (%)": [4.0, 3.8, 3.6],
+    "Loan Term (Years)": [20, 20, 20],
+    "Fees (€)": [0.0, 1500.0, 2500.0],
+    "Points (%)": [0.0, 0.5, 1.0],
+})
+INTEREST_ACCRUAL_OPTIONS = {"Monthly": None, "Daily (Actual/365)": "actual/365", "Daily (30/360)": "30/360"}
 
 
 def create_loan_chart(schedule):
@@ -70,6 +62,55 @@ def create_loan_chart(schedule):
     return fig
 
 
+@st.cache_data(max_entries=64)
+def cached_sensitivity_grid(principal, monthly_extra_payment):
+    """Sensitivity grid over SENSITIVITY_RATES x SENSITIVITY_TERMS, cached per principal and extra payment."""
+    return sensitivity_grid(principal, monthly_extra_payment, SENSITIVITY_RATES, SENSITIVITY_TERMS)
+
+
+def create_sensitivity_heatmap(grid, column):
+    """Create a plotly heatmap of one loan total over the rate x term grid."""
+    fig = go.Figure(go.Heatmap(
+        x=SENSITIVITY_RATES,
+        y=SENSITIVITY_TERMS,
+        z=grid[column],
+        colorscale="Viridis",
+        colorbar=dict(title="€"),
+        hovertemplate="Rate: %{x:.1f}%<br>Term: %{y} years<br>€%{z:,.2f}<extra></extra>",
+    ))
+
+    fig.update_layout(
+        title=column.replace(" (€)", "") + " by Rate and Term",
+        xaxis_title="Annual Interest Rate (%)",
+        yaxis_title="Loan Term (Years)",
+        template="plotly_white",
+    )
+
+    return fig
+
+
+def create_refinance_heatmap(analysis, candidate_rates):
+    """Create a plotly heatmap of net refinance savings over refinance month x candidate rate."""
+    fig = go.Figure(go.Heatmap(
+        x=candidate_rates,
+        y=analysis["Refinance Month"],
+        z=analysis["Net Savings (€)"],
+        colorscale="RdYlGn",
+        zmid=0,
+        colorbar=dict(title="€"),
+        hovertemplate="New rate: %{x:.2f}%<br>Month: %{y}<br>Net savings: €%{z:,.2f}<extra></extra>",
+    ))
+
+    fig.update_layout(
+        title="Net Savings of Refinancing",
+        xaxis_title="New Annual Interest Rate (%)",
+        yaxis_title="Refinance Month",
+        template="plotly_white",
+    )
+
+    return fig
+
+
 def show_loan_simulation():
     """Display the Loan Simulation tool."""
     st.title("Loan Simulator")
@@ -78,8 +119,26 @@ def show_loan_simulation():
     # Inputs for loan parameters
     principal = st.number_input("Loan Amount (€)", min_value=0.0, value=100000.0, step=1000.0)
     annual_interest_rate = st.slider("Annual Interest Rate (%)", min_value=0.0, max_value=20.0, value=5.0, step=0.1)
-    loan_term_years = st.slider("Loan Term (Years)", min_value=1, max_value=30, value=15, step=1)
+    loan_term_years = st.slider("Loan Term (Years)", min_value=1, max_value=50, value=15, step=1)
     monthly_extra_payment = st.number_input("Monthly Extra Payment (€)", min_value=0.0, value=0.0, step=100.0)
+    adjustable_rate = st.checkbox("Adjustable Rate (rate resets during the term)")
+    rate_schedule = None
+    if adjustable_rate:
+        st.write("Enter the month each new rate takes effect:")
+        resets = st.data_editor(
+            pd.DataFrame({"Month": [61], "Annual Interest Rate (%)": [6.0]}),
+            num_rows="dynamic",
+        )
+        rate_schedule = list(resets.dropna().itertuples(index=False, name=None))
+
+    interest_accrual = st.selectbox("Interest Accrual", list(INTEREST_ACCRUAL_OPTIONS))
+    day_count = INTEREST_ACCRUAL_OPTIONS[interest_accrual]
+    if day_count:
+        # Actual day counts depend on the calendar, so the schedule is pinned to a chosen start
+        start_date = st.date_input("Loan Start Date", value=datetime.date.today().replace(day=1))
+    exact_cents = st.checkbox(
+        "Exact Cents (post every payment in whole cents with banker's rounding, as lenders do)"
+    )
 
     # Validate inputs
     if principal == 0 or loan_term_years == 0:
@@ -87,25 +146,104 @@ def show_loan_simulation():
         return
 
     # Calculate loan schedule
-    schedule = calculate_loan_schedule(principal, annual_interest_rate, loan_term_years, monthly_extra_payment)
+    if day_count:
+        if adjustable_rate or exact_cents:
+            st.caption("Daily accrual uses the initial rate in floating point; rate resets and exact cents are ignored.")
+        schedule = daily_accrual_schedule(
+            principal, annual_interest_rate, loan_term_years, monthly_extra_payment, start_date, day_count
+        )
+    elif exact_cents:
+        schedule = calculate_loan_schedule(
+            principal, annual_interest_rate, loan_term_years, monthly_extra_payment, rate_schedule, exact=True
+        )
+    else:
+        schedule = cached_loan_schedule(
+            principal, annual_interest_rate, loan_term_years, monthly_extra_payment, rate_schedule
+        )
 
-    # Display chart
-    fig = create_loan_chart(schedule)
-    st.plotly_chart(fig)
+    schedule_tab, sensitivity_tab, refinance_tab = st.tabs(["Schedule", "Sensitivity", "Refinance"])
 
-    # Display summary
-    total_months = schedule["Month"].iloc[-1]
-    total_interest_paid = schedule["Total Interest Paid (€)"].iloc[-1]
-    total_paid = schedule["Monthly Payment (€)"].sum()
+    with schedule_tab:
+        # Display chart
+        fig = create_loan_chart(schedule)
+        st.plotly_chart(fig)
 
-    st.write("### Loan Summary")
-    st.write(f"**Total Months to Repay:** {total_months}")
-    st.write(f"**Total Interest Paid:** €{total_interest_paid:,.2f}")
-    st.write(f"**Total Amount Paid:** €{total_paid:,.2f}")
+        # Display summary
+        total_months = schedule["Month"].iloc[-1]
+        total_interest_paid = schedule["Total Interest Paid (€)"].iloc[-1]
+        total_paid = schedule["Monthly Payment (€)"].sum()
 
-    # Display schedule table
-    st.write("### Repayment Schedule")
-    st.dataframe(schedule.style.format("{:,.2f}"))
+        st.write("### Loan Summary")
+        st.write(f"**Total Months to Repay:** {total_months}")
+        st.write(f"**Total Interest Paid:** €{total_interest_paid:,.2f}")
+        st.write(f"**Total Amount Paid:** €{total_paid:,.2f}")
+
+        # Payoff goal seek
+        st.write("### Payoff Goal Seek")
+        solver_mode = st.radio(
+            "Solve for",
+            ["Extra payment for a target payoff", "Payoff time for an extra payment"],
+            horizontal=True,
+        )
+        if adjustable_rate:
+            st.caption("The goal seek assumes the initial interest rate for the whole term.")
+        if solver_mode == "Extra payment for a target payoff":
+            target_months = st.number_input(
+                "Target Payoff (Months)", min_value=1, max_value=loan_term_years * 12, value=loan_term_years * 6
+            )
+            required_extra = float(required_extra_payment(principal, annual_interest_rate, loan_term_years, target_months))
+            st.write(f"**Required Monthly Extra Payment:** €{required_extra:,.2f}")
+        else:
+            tested_extra_payment = st.number_input(
+                "Monthly Extra Payment to Test (€)", min_value=0.0, value=monthly_extra_payment, step=100.0
+            )
+            months = int(payoff_month(principal, annual_interest_rate, loan_term_years, tested_extra_payment))
+            st.write(f"**Loan Paid Off After:** {months // 12} years and {months % 12} months ({months} months)")
+
+        # Display schedule table
+        st.write("### Repayment Schedule")
+        st.dataframe(schedule.style.format("{:,.2f}"))
+        show_export(schedule, "loan_schedule", key="loan_schedule")
+
+        with st.expander("Schedule Cache Statistics"):
+            st.write(schedule_cache.stats())
+
+    with sensitivity_tab:
+        st.write("### Rate × Term Sensitivity")
+        st.write("Monthly payment and total interest for every interest rate and loan term, at your loan amount.")
+        grid = cached_sensitivity_grid(principal, monthly_extra_payment)
+        st.plotly_chart(create_sensitivity_heatmap(grid, "Monthly Payment (€)"))
+        st.plotly_chart(create_sensitivity_heatmap(grid, "Total Interest Paid (€)"))
+
+    with refinance_tab:
+        st.write("### Refinance Analyzer")
+        st.write("Net savings of refinancing in every month of the loan at each candidate rate, after closing costs.")
+        if adjustable_rate:
+            st.caption("The refinance analysis assumes the initial interest rate for the whole term.")
+        offers = st.data_editor(
+            pd.DataFrame({"New Rate (%)": [3.0, 3.5, 4.0, 4.5], "Closing Costs (€)": [3000.0] * 4}),
+            num_rows="dynamic",
+            key="refinance_offers",
+        )
+        offers = offers.dropna().sort_values("New Rate (%)")
+        analysis = refinance_analysis(
+            principal, annual_interest_rate, loan_term_years, monthly_extra_payment,
+            offers["New Rate (%)"], offers["Closing Costs (€)"],
+        )
+        if offers.empty or analysis["Refinance Month"].size == 0:
+            st.info("Add at least one candidate rate for a loan that runs longer than one month.")
+        else:
+            st.plotly_chart(create_refinance_heatmap(analysis, offers["New Rate (%)"]))
+            best_month = analysis["Net Savings (€)"].argmax(axis=0)
+            candidates = np.arange(len(offers))
+            st.dataframe(pd.DataFrame({
+                "New Rate (%)": offers["New Rate (%)"].to_numpy(),
+                "Closing Costs (€)": offers["Closing Costs (€)"].to_numpy(),
+                "Best Refinance Month": analysis["Refinance Month"][best_month],
+                "New Monthly Payment (€)": analysis["New Monthly Payment (€)"][best_month, candidates],
+                "Net Savings (€)": analysis["Net Savings (€)"][best_month, candidates],
+                "Break-even Month": analysis["Break-even Month"][best_month, candidates],
+            }).style.format("{:,.2f}", na_rep="Never"))
 
     # Disclaimer
     st.write("---")
@@ -113,3 +251,76 @@ def show_loan_simulation():
         "Disclaimer: This tool is for simulation purposes only and should not be considered financial advice. "
         "Please consult with a financial advisor or loan officer for accurate loan calculations."
     )
+
+
+def create_offer_chart(comparison):
+    """Create a plotly scatter of effective APR against total cost for every offer."""
+    fig = go.Figure(go.Scatter(
+        x=comparison["APR (%)"],
+        y=comparison["Total Cost (€)"],
+        mode="markers",
+        text=comparison["Lender"],
+        marker=dict(size=10, color="blue"),
+        hovertemplate="%{text}<br>APR: %{x:.3f}%<br>Total cost: €%{y:,.2f}<extra></extra>",
+    ))
+
+    fig.update_layout(
+        title="Loan Offers: APR vs Total Cost",
+        xaxis_title="Effective APR (%)",
+        yaxis_title="Total Cost of Borrowing (€)",
+        template="plotly_white",
+    )
+
+    return fig
+
+
+def show_loan_comparison():
+    """Display the Loan Offer Comparison tool."""
+    st.title("Loan Offer Comparison")
+    st.write("Compare lender offers that differ in rate, fees, term and points by effective APR and total cost.")
+
+    # Offers can be uploaded in bulk or edited in place
+    uploaded_offers = st.file_uploader("Upload Offers (CSV with the columns below)", type="csv")
+    offers = DEFAULT_OFFERS
+    if uploaded_offers:
+        try:
+            offers = pd.read_csv(uploaded_offers, usecols=OFFER_COLUMNS)
+            offers[OFFER_COLUMNS[1:]] = offers[OFFER_COLUMNS[1:]].apply(pd.to_numeric)
+        except ValueError as error:
+            st.error(f"Could not read the offers file ({error}). Expected a CSV with the columns: "
+                     f"{', '.join(OFFER_COLUMNS)}, all numeric except Lender.")
+            return
+    offers = st.data_editor(offers, num_rows="dynamic").dropna()
+
+    if offers.empty:
+        st.warning("Please enter at least one complete offer.")
+        return
+
+    comparison = compare_loan_offers(offers)
+    best_apr = comparison.iloc[0]
+    best_cost = comparison.loc[comparison["Total Cost (€)"].idxmin()]
+
+    st.write("### Comparison Summary")
+    st.write(f"**Lowest APR:** {best_apr['Lender']} at {best_apr['APR (%)']:.3f}%")
+    st.write(f"**Lowest Total Cost:** {best_cost['Lender']} at €{best_cost['Total Cost (€)']:,.2f}")
+
+    st.plotly_chart(create_offer_chart(comparison))
+
+    st.write("### Ranked Offers")
+    st.dataframe(comparison.style.format({
+        "Loan Amount (€)": "{:,.2f}",
+        "Annual Interest Rate (%)": "{:.2f}",
+        "Fees (€)": "{:,.2f}",
+        "Points (%)": "{:.2f}",
+        "Monthly Payment (€)": "{:,.2f}",
+        "APR (%)": "{:.3f}",
+        "Total Cost (€)": "{:,.2f}",
+    }))
+    show_export(comparison, "loan_offers", key="loan_offers")
+
+    # Disclaimer
+    st.write("---")
+    st.caption(
+        "Disclaimer: This tool is for simulation purposes only and should not be considered financial advice. "
+        "The APR shown includes only the fees and points entered above."
+    )
@@ -0,0 +1,228 @@
+"""Array engine for the FinancePro Planner.
+
+Month-by-month cash flows of buying a property versus renting and investing,
+computed as NumPy arrays with a trailing months axis so that whole grids of
+assumptions broadcast through the same formulas.
+"""
+import numpy as np
+
+from .loan_engine import annuity_payment, balance_after, monthly_rate
+from .retirement_engine import PERCENTILE_BANDS, chunk_seed
+from .solvers import bisect
+
+# Goal-seek scenarios -> planner_cash_flows net worth path
+NET_WORTH_SCENARIOS = {"Rent & Invest": "rent_net_worth", "Buy": "buy_net_worth"}
+
+
+def monthly_growth(annual_rate):
+    """Monthly decimal growth equivalent to an annual percentage rate compounded once a year."""
+    return (1 + np.asarray(annual_rate, dtype=float) / 100) ** (1 / 12) - 1
+
+
+def invested_balance(initial, contributions, monthly_return):
+    """Month-end balances of an investment account, starting with month 0.
+
+    Each month the balance earns `monthly_return` and then receives that
+    month's contribution (negative contributions withdraw). The path is
+    V_m = (1 + r)^m * (V_0 + sum of c_j / (1 + r)^j), i.e. a single cumsum.
+    """
+    growth = (1 + np.asarray(monthly_return, dtype=float)[..., None]) ** np.arange(contributions.shape[-1] + 1)
+    discounted = np.cumsum(contributions / growth[..., 1:], axis=-1)
+    discounted = np.concatenate([np.zeros(discounted.shape[:-1] + (1,)), discounted], axis=-1)
+    return growth * (np.asarray(initial, dtype=float)[..., None] + discounted)
+
+
+def planner_cash_flows(initial_capital, monthly_savings, investment_rate, property_price, property_growth,
+                       mortgage_rate, mortgage_years, down_payment, monthly_rent, rent_growth, years):
+    """Monthly paths (month 0 to years x 12) of buying versus renting and investing the difference.
+
+    Buying: the down payment (% of the price) comes out of the capital and
+    the rest is invested; monthly savings pay the mortgage and whatever is
+    left is invested (a shortfall is drawn from the investments). Renting:
+    all capital is invested and monthly savings minus the rent, which grows
+    at `rent_growth`, are invested. Rates are annual percentages; every input
+    broadcasts, so grids of scenarios evaluate in one pass.
+    """
+    (initial_capital, monthly_savings, investment_rate, property_price, property_growth, mortgage_rate,
+     mortgage_months, down_payment, monthly_rent, rent_growth) = (
+        np.asarray(value, dtype=float)[..., None]
+        for value in (initial_capital, monthly_savings, investment_rate, property_price, property_growth,
+                      mortgage_rate, np.asarray(mortgage_years) * 12, down_payment, monthly_rent, rent_growth)
+    )
+    month = np.arange(years * 12 + 1)
+    paying = (month >= 1) & (month <= mortgage_months)
+
+    # Mortgage on the price less the down payment
+    down_payment_amount = property_price * down_payment / 100
+    principal = property_price - down_payment_amount
+    interest_rate = monthly_rate(mortgage_rate)
+    payment = annuity_payment(principal, interest_rate, mortgage_months)
+    mortgage_balance = np.where(
+        month <= mortgage_months, np.maximum(balance_after(principal, interest_rate, payment, month), 0.0), 0.0
+    )
+    mortgage_payments = np.where(paying, payment, 0.0)
+    mortgage_interest = np.where(paying, np.roll(mortgage_balance, 1, axis=-1) * interest_rate, 0.0)
+
+    property_value = property_price * (1 + property_growth / 100) ** (month / 12)
+    rent = np.where(month >= 1, monthly_rent * (1 + monthly_growth(rent_growth)) ** np.maximum(month - 1, 0), 0.0)
+
+    investment_return = monthly_growth(investment_rate[..., 0])
+    buy_investments = invested_balance(
+        (initial_capital - down_payment_amount)[..., 0], (monthly_savings - mortgage_payments)[..., 1:],
+        investment_return,
+    )
+    rent_investments = invested_balance(
+        initial_capital[..., 0], (monthly_savings - rent)[..., 1:], investment_return
+    )
+    equity = property_value - mortgage_balance
+    return {
+        "property_value": property_value,
+        "mortgage_balance": mortgage_balance,
+        "mortgage_payments": mortgage_payments,
+        "mortgage_interest": mortgage_interest,
+        "equity": equity,
+        "buy_investments": buy_investments,
+        "buy_net_worth": buy_investments + equity,
+        "rent": rent,
+        "rent_net_worth": rent_investments,
+    }
+
+
+def year_end(values):
+    """Year-end values of a monthly path that starts with month 0, by reshaping into (years x 12)."""
+    return values[..., 1:].reshape(values.shape[:-1] + (-1, 12))[..., -1]
+
+
+def yearly_totals(flows):
+    """Yearly sums of a monthly flow that starts with month 0, by reshaping into (years x 12)."""
+    return flows[..., 1:].reshape(flows.shape[:-1] + (-1, 12)).sum(axis=-1)
+
+
+def rent_vs_buy_grid(initial_capital, monthly_savings, property_price, down_payment, mortgage_years, monthly_rent,
+                     rent_growth, investment_rates, property_growths, mortgage_rates, holding_years):
+    """Net worth of buying minus renting for every combination of the four swept assumptions.
+
+    The rate axes broadcast through planner_cash_flows in a single pass and
+    the holding periods are read off the monthly paths, giving an array shaped
+    (investment rates x property growths x mortgage rates x holding years).
+    Positive values mean buying comes out ahead.
+    """
+    holding_months = np.asarray(holding_years) * 12
+    flows = planner_cash_flows(
+        initial_capital, monthly_savings, np.asarray(investment_rates, dtype=float)[:, None, None], property_price,
+        np.asarray(property_growths, dtype=float)[None, :, None], down_payment=down_payment,
+        mortgage_rate=np.asarray(mortgage_rates, dtype=float)[None, None, :], mortgage_years=mortgage_years,
+        monthly_rent=monthly_rent, rent_growth=rent_growth, years=int(holding_months.max()) // 12,
+    )
+    return flows["buy_net_worth"][..., holding_months] - flows["rent_net_worth"][..., holding_months]
+
+
+def required_monthly_savings(target_net_worth, scenario, initial_capital, investment_rate, property_price,
+                             property_growth, mortgage_rate, mortgage_years, down_payment, monthly_rent, rent_growth,
+                             years):
+    """Monthly savings that reach `target_net_worth` after `years` in a NET_WORTH_SCENARIOS scenario; 0 if on track.
+
+    Net worth is linear in monthly savings (every euro saved is invested),
+    so this is closed form: the shortfall without savings divided by the
+    future value of one euro saved per month.
+    """
+    without_savings = planner_cash_flows(
+        initial_capital, 0.0, investment_rate, property_price, property_growth, mortgage_rate, mortgage_years,
+        down_payment, monthly_rent, rent_growth, years,
+    )[NET_WORTH_SCENARIOS[scenario]][..., -1]
+    per_euro = invested_balance(0.0, np.ones(years * 12), monthly_growth(investment_rate))[..., -1]
+    return np.maximum((target_net_worth - without_savings) / per_euro, 0.0)
+
+
+def required_investment_rate(target_net_worth, scenario, initial_capital, monthly_savings, property_price,
+                             property_growth, mortgage_rate, mortgage_years, down_payment, monthly_rent,
+                             rent_growth, years, low=-20.0, high=50.0):
+    """Investment rate (% per year) that reaches `target_net_worth` after `years`.
+
+    Bisection over the cash-flow engine; np.nan when no rate between `low`
+    and `high` brackets the target.
+    """
+    def shortfall(investment_rate):
+        return planner_cash_flows(
+            initial_capital, monthly_savings, investment_rate, property_price, property_growth, mortgage_rate,
+            mortgage_years, down_payment, monthly_rent, rent_growth, years,
+        )[NET_WORTH_SCENARIOS[scenario]][..., -1] - target_net_worth
+
+    shape = np.shape(target_net_worth)
+    low, high = np.full(shape, float(low)), np.full(shape, float(high))
+    rate = bisect(shortfall, low, high, tol=1e-7)
+    return np.where(np.sign(shortfall(low)) != np.sign(shortfall(high)), rate, np.nan)
+
+
+def months_to_target(target_net_worth, scenario, initial_capital, monthly_savings, investment_rate, property_price,
+                     property_growth, mortgage_rate, mortgage_years, down_payment, monthly_rent, rent_growth,
+                     max_years=100):
+    """First month in which net worth reaches `target_net_worth`, read off the monthly paths; np.inf if never."""
+    net_worth = planner_cash_flows(
+        initial_capital, monthly_savings, investment_rate, property_price, property_growth, mortgage_rate,
+        mortgage_years, down_payment, monthly_rent, rent_growth, max_years,
+    )[NET_WORTH_SCENARIOS[scenario]]
+    reached = net_worth >= np.asarray(target_net_worth, dtype=float)[..., None]
+    return np.where(reached.any(axis=-1), reached.argmax(axis=-1), np.inf)
+
+
+def simulate_planner(initial_capital, monthly_savings, investment_rate, property_price, property_growth,
+                     mortgage_rate, mortgage_years, down_payment, monthly_rent, rent_growth, years,
+                     investment_volatility=15.0, property_volatility=5.0, correlation=0.3,
+                     paths=50_000, seed=0, chunk_size=2_048):
+    """Monte Carlo of buying versus renting and investing with correlated equity and housing returns.
+
+    Yearly returns are drawn as correlated normals through the Cholesky
+    factor of their covariance, in chunks of paths seeded per chunk (as in
+    the retirement simulation). The monthly net cash flows of
+    planner_cash_flows earn each year's return pro rata over the months
+    left in the year; the mortgage stays deterministic. Growth paths are a
+    cumprod over years, so the only Python loop is over chunks of paths.
+    Returns percentile bands of the rent-and-invest portfolio and the
+    property value, and the probability per year that renting and
+    investing beats buying.
+    """
+    flows = planner_cash_flows(
+        initial_capital, monthly_savings, investment_rate, property_price, property_growth, mortgage_rate,
+        mortgage_years, down_payment, monthly_rent, rent_growth, years,
+    )
+    rent_flows = (monthly_savings - flows["rent"])[1:].reshape(years, 12)
+    buy_flows = (monthly_savings - flows["mortgage_payments"])[1:].reshape(years, 12)
+    months_left = np.arange(11, -1, -1) / 12
+    mortgage_balance = year_end(flows["mortgage_balance"])
+    buy_capital = initial_capital - property_price * down_payment / 100
+
+    means = np.array([investment_rate, property_growth]) / 100
+    volatilities = np.array([investment_volatility, property_volatility]) / 100
+    covariance = np.array([[1.0, correlation], [correlation, 1.0]]) * np.outer(volatilities, volatilities)
+    cholesky = np.linalg.cholesky(covariance + np.eye(2) * 1e-12)
+
+    investment = np.empty((paths, years))
+    property_value = np.empty((paths, years))
+    invest_wins = np.zeros(years, dtype=np.int64)
+    for chunk_index in range(-(-paths // chunk_size)):
+        rows = slice(chunk_index * chunk_size, min((chunk_index + 1) * chunk_size, paths))
+        rng = np.random.default_rng(chunk_seed(seed, chunk_index))
+        returns = means + rng.standard_normal((rows.stop - rows.start, years, 2)) @ cholesky.T
+        growth = np.cumprod(1 + np.maximum(returns, -0.99), axis=1)
+
+        # Year-end value of each year's monthly flows, growing over the months left in that year
+        intra_year_growth = (1 + np.maximum(returns[..., 0], -0.99))[..., None] ** months_left
+        rent_contributions = np.einsum("pym,ym->py", intra_year_growth, rent_flows)
+        buy_contributions = np.einsum("pym,ym->py", intra_year_growth, buy_flows)
+
+        equity_growth = growth[..., 0]
+        investment[rows] = equity_growth * (initial_capital + np.cumsum(rent_contributions / equity_growth, axis=1))
+        property_value[rows] = property_price * growth[..., 1]
+        buy_net_worth = (
+            equity_growth * (buy_capital + np.cumsum(buy_contributions / equity_growth, axis=1))
+            + property_value[rows] - mortgage_balance
+        )
+        invest_wins += (investment[rows] > buy_net_worth).sum(axis=0)
+
+    return {
+        "years": np.arange(1, years + 1),
+        "investment_percentiles": np.percentile(investment, PERCENTILE_BANDS, axis=0),
+        "property_percentiles": np.percentile(property_value, PERCENTILE_BANDS, axis=0),
+        "invest_beats_buy": invest_wins / paths,
+    }
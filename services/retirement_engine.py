@@ -0,0 +1,791 @@
+"""Array engine for the Retirement Simulator.
+
+Only NumPy is used here, so the projections can run from batch jobs and
+worker processes without a Streamlit session.
+"""
+import atexit
+import math
+import os
+import threading
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_all_start_methods, get_context, shared_memory
+
+import numpy as np
+
+from .solvers import bisect
+
+
+def net_monthly_return(annual_return, tax_rate):
+    """Monthly decimal return after tax on investment returns."""
+    return annual_return * (1 - tax_rate / 100) / 12 / 100
+
+
+def _yearly_growth(annual_return, tax_rate, monthly_contribution, annual_lump_sum):
+    """Yearly growth factor and year-end value of one year's contributions, with zero returns handled element-wise."""
+    monthly_rate = net_monthly_return(annual_return, tax_rate)
+    annual_growth = (1 + monthly_rate) ** 12
+    # Twelve month-end contributions grow by (g - 1) / r, which is 12 without returns;
+    # a scalar rate skips the element-wise handling, which would cost more than the projection
+    flat = monthly_rate == 0
+    if isinstance(flat, (bool, np.bool_)) and not flat:
+        contribution_growth = (annual_growth - 1) / monthly_rate
+    else:
+        contribution_growth = np.where(flat, 12.0, (annual_growth - 1) / np.where(flat, 1.0, monthly_rate))
+    return annual_growth, monthly_contribution * contribution_growth + annual_lump_sum
+
+
+def _compound(initial_savings, annual_growth, yearly_addition, years):
+    # (S0 + k) * g^y - k, with k = a / (g - 1) the balance the additions alone sustain; without growth S0 + a * y
+    flat = annual_growth == 1
+    if isinstance(flat, (bool, np.bool_)) and not flat:
+        steady_state = yearly_addition / (annual_growth - 1)
+        savings = annual_growth ** years
+        savings *= initial_savings + steady_state
+        savings -= steady_state
+        return savings
+    steady_state = yearly_addition / np.where(flat, 1.0, annual_growth - 1)
+    savings = (initial_savings + steady_state) * annual_growth ** years - steady_state
+    return np.where(flat, initial_savings + yearly_addition * years, savings)
+
+
+def calculate_invested_savings(current_age, target_age, initial_savings, monthly_contribution, annual_lump_sum,
+                               annual_return, tax_rate):
+    """Calculate annual invested savings including monthly contributions and an annual lump sum.
+
+    Each year-end value comes straight from the geometric-series closed form:
+    the starting balance compounds for 12y months, and every year adds the
+    future value of twelve contributions plus the lump sum.
+    """
+    years = np.arange(target_age - current_age + 1.0)
+    annual_growth, yearly_addition = _yearly_growth(annual_return, tax_rate, monthly_contribution, annual_lump_sum)
+    return _compound(initial_savings, annual_growth, yearly_addition, years)
+
+
+def calculate_non_invested_savings(current_age, target_age, initial_savings, monthly_contribution, annual_lump_sum):
+    """Calculate annual non-invested savings."""
+    years = np.arange(target_age - current_age + 1)
+    return initial_savings + years * (monthly_contribution * 12 + annual_lump_sum)
+
+
+def calculate_real_savings(invested_savings, current_age, target_age, inflation_rate):
+    """Calculate inflation-adjusted ('real') savings."""
+    invested_savings = np.asarray(invested_savings, dtype=float)
+    return invested_savings / (1 + inflation_rate / 100) ** np.arange(invested_savings.shape[-1])
+
+
+# ---------------------------
+# Drawdown during retirement
+# ---------------------------
+MAX_DRAWDOWN_YEARS = 100
+
+
+def drawdown_balances(balance, first_withdrawal, annual_return, inflation_rate, tax_rate, months):
+    """Month-end balances while withdrawing an inflation-indexed amount and investing the rest.
+
+    Every month the balance earns the after-tax return and then pays a
+    withdrawal that grows with inflation. Inputs broadcast over scenarios; the
+    result has a trailing months axis and is not clamped at zero.
+    """
+    balance, first_withdrawal, monthly_rate, inflation_rate = (
+        np.asarray(value, dtype=float)[..., None]
+        for value in (balance, first_withdrawal, net_monthly_return(annual_return, tax_rate), inflation_rate)
+    )
+    months = np.arange(1, months + 1)
+    growth = (1 + monthly_rate) ** months
+    indexation = (1 + inflation_rate / 100) ** (1 / 12)
+
+    # Withdrawals discounted at the portfolio return form a geometric series in (indexation / growth)
+    withdrawals_value = np.cumsum(indexation ** (months - 1) / growth, axis=-1)
+    return growth * (balance - first_withdrawal * withdrawals_value)
+
+
+def years_savings_last(balance, first_withdrawal, annual_return, inflation_rate, tax_rate,
+                       max_years=MAX_DRAWDOWN_YEARS):
+    """Fractional years until savings run out; np.inf when they outlast `max_years` or nothing is withdrawn."""
+    balances = drawdown_balances(balance, first_withdrawal, annual_return, inflation_rate, tax_rate, max_years * 12)
+    depleted = balances <= 0
+    month = np.argmax(depleted, axis=-1)
+
+    # Interpolate within the month in which the balance crosses zero
+    before = np.where(month > 0, np.take_along_axis(balances, np.maximum(month - 1, 0)[..., None], -1)[..., 0],
+                      np.asarray(balance, dtype=float))
+    after = np.take_along_axis(balances, month[..., None], -1)[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        months_lasted = month + before / (before - after)
+    withdrawing = np.asarray(first_withdrawal, dtype=float) > 0
+    return np.where(depleted.any(axis=-1) & withdrawing, months_lasted / 12, np.inf)
+
+
+def safe_withdrawal_rate(balance, annual_return, inflation_rate, tax_rate, years):
+    """First-year withdrawal, as a % of savings, that empties the savings exactly after `years`.
+
+    Solved by bisection over the drawdown engine, for all scenarios at once.
+    """
+    balance, annual_return, inflation_rate, tax_rate = np.broadcast_arrays(
+        *(np.asarray(value, dtype=float) for value in (balance, annual_return, inflation_rate, tax_rate))
+    )
+    rate = bisect(
+        lambda rate: drawdown_balances(
+            balance, balance * rate / 100 / 12, annual_return, inflation_rate, tax_rate, int(years * 12)
+        )[..., -1],
+        np.zeros_like(balance), np.full_like(balance, 1200.0), tol=1e-6,
+    )
+    return np.where(balance > 0, rate, 0.0)
+
+
+# ---------------------------
+# Product comparison
+# ---------------------------
+def invested_savings_grid(current_age, target_age, initial_savings, monthly_contribution, annual_lump_sum,
+                          annual_returns, tax_rate):
+    """Year-end invested savings for several expected returns at once, shaped (returns x years).
+
+    Same closed form as calculate_invested_savings, with one row per return.
+    """
+    years = np.arange(target_age - current_age + 1.0)
+    annual_growth, yearly_addition = _yearly_growth(
+        np.asarray(annual_returns, dtype=float)[:, None], tax_rate, monthly_contribution, annual_lump_sum
+    )
+    return _compound(initial_savings, annual_growth, yearly_addition, years)
+
+
+def compare_products(current_age, target_age, end_age, initial_savings, monthly_contribution, annual_lump_sum,
+                     annual_returns, tax_rate, inflation_rate, monthly_expenses):
+    """Project every expected return in one batched pass.
+
+    Returns the nominal and real savings paths (returns x years), how many
+    years savings last in retirement and the safe withdrawal rate up to `end_age`.
+    """
+    annual_returns = np.asarray(annual_returns, dtype=float)
+    invested = invested_savings_grid(
+        current_age, target_age, initial_savings, monthly_contribution, annual_lump_sum, annual_returns, tax_rate
+    )
+    at_retirement = invested[:, -1]
+    first_withdrawal = monthly_expenses * (1 + inflation_rate / 100) ** (target_age - current_age)
+    return {
+        "invested": invested,
+        "real": calculate_real_savings(invested, current_age, target_age, inflation_rate),
+        "years_last": years_savings_last(at_retirement, first_withdrawal, annual_returns, inflation_rate, tax_rate),
+        "safe_withdrawal_rate": safe_withdrawal_rate(
+            at_retirement, annual_returns, inflation_rate, tax_rate, end_age - target_age
+        ),
+    }
+
+
+# ---------------------------
+# Sensitivity analysis
+# ---------------------------
+TORNADO_INPUTS = ("annual_return", "inflation_rate", "tax_rate", "monthly_contribution", "annual_lump_sum",
+                  "target_age")
+
+
+def retirement_outcomes(current_age, target_age, initial_savings, monthly_contribution, annual_lump_sum,
+                        annual_return, tax_rate, inflation_rate, monthly_expenses):
+    """Real savings at retirement and the years they last, broadcast over arrays of scenarios."""
+    years = np.asarray(target_age, dtype=float) - current_age
+    annual_return = np.asarray(annual_return, dtype=float)
+    annual_growth, yearly_addition = _yearly_growth(annual_return, tax_rate, monthly_contribution, annual_lump_sum)
+    at_retirement = _compound(initial_savings, annual_growth, yearly_addition, years)
+
+    price_level = (1 + np.asarray(inflation_rate, dtype=float) / 100) ** years
+    years_last = years_savings_last(
+        at_retirement, monthly_expenses * price_level, annual_return, inflation_rate, tax_rate
+    )
+    return at_retirement / price_level, years_last
+
+
+def tornado_analysis(current_age, target_age, initial_savings, monthly_contribution, annual_lump_sum,
+                     annual_return, tax_rate, inflation_rate, monthly_expenses, change=10.0):
+    """Outcomes of moving each of TORNADO_INPUTS down and up by `change` percent.
+
+    The base case and every low/high scenario form one (inputs + 1) x 2
+    batch that is evaluated in a single call. Retirement ages are rounded
+    to whole years and longevity is capped at MAX_DRAWDOWN_YEARS so swings
+    stay finite. Returns the base outcomes and (inputs x 2) low/high outcomes.
+    """
+    inputs = {
+        "annual_return": annual_return, "inflation_rate": inflation_rate, "tax_rate": tax_rate,
+        "monthly_contribution": monthly_contribution, "annual_lump_sum": annual_lump_sum, "target_age": target_age,
+    }
+    scenarios = {name: np.full((len(TORNADO_INPUTS) + 1, 2), float(value)) for name, value in inputs.items()}
+    for row, name in enumerate(TORNADO_INPUTS):
+        scenarios[name][row] *= 1 + np.array([-change, change]) / 100
+    scenarios["target_age"] = np.maximum(np.rint(scenarios["target_age"]), current_age + 1)
+
+    real_savings, years_last = retirement_outcomes(
+        current_age, initial_savings=initial_savings, monthly_expenses=monthly_expenses, **scenarios
+    )
+    years_last = np.minimum(years_last, MAX_DRAWDOWN_YEARS)
+    return {
+        "base_real_savings": real_savings[-1, 0],
+        "base_years_last": years_last[-1, 0],
+        "real_savings": real_savings[:-1],
+        "years_last": years_last[:-1],
+    }
+
+
+# ---------------------------
+# Multiple account types
+# ---------------------------
+# Default accounts, in contribution priority order; a cap of None means unlimited
+ACCOUNT_TYPES = {
+    "Tax-Free": {"annual_cap": 5000.0, "tax_on_returns": 0.0, "tax_on_withdrawals": 0.0},
+    "Tax-Deferred": {"annual_cap": 8000.0, "tax_on_returns": 0.0, "tax_on_withdrawals": 25.0},
+    "Taxable": {"annual_cap": None, "tax_on_returns": 15.0, "tax_on_withdrawals": 0.0},
+}
+
+
+def allocate_contributions(amount, caps):
+    """Split `amount` over accounts in column order, filling each up to its cap (a vectorized waterfall)."""
+    filled = np.minimum(np.cumsum(np.asarray(caps, dtype=float), axis=-1), np.asarray(amount, dtype=float)[..., None])
+    return np.diff(filled, axis=-1, prepend=0.0)
+
+
+def multi_account_savings(current_age, target_age, initial_balances, monthly_contribution, annual_lump_sum,
+                          annual_return, return_tax_rates, annual_caps):
+    """Year-end balances per account, shaped (years x accounts).
+
+    Monthly contributions fill the accounts' annual caps in column order and
+    the lump sum fills the room left; anything above the total cap is not
+    invested. Each account then compounds in closed form at its own after-tax
+    return, so extra accounts only add columns.
+    """
+    years = np.arange(target_age - current_age + 1.0)[:, None]
+    monthly = allocate_contributions(12 * monthly_contribution, annual_caps)
+    lump_sum = allocate_contributions(annual_lump_sum, np.asarray(annual_caps, dtype=float) - monthly)
+    annual_growth, yearly_addition = _yearly_growth(
+        np.asarray(annual_return, dtype=float), np.asarray(return_tax_rates, dtype=float), monthly / 12, lump_sum
+    )
+    return _compound(np.asarray(initial_balances, dtype=float), annual_growth, yearly_addition, years)
+
+
+def multi_account_drawdown(balances, first_withdrawal, annual_return, return_tax_rates, withdrawal_tax_rates,
+                           inflation_rate, order, months=MAX_DRAWDOWN_YEARS * 12):
+    """Drain accounts one after another in `order` to fund an inflation-indexed net withdrawal.
+
+    Withdrawals from an account are grossed up for its withdrawal tax; the
+    other accounts keep growing until their turn. Each account's path comes
+    from the drawdown closed form over all months at once, so the loop runs
+    over accounts, not months. Returns month-end balances (months x accounts)
+    and the fractional years until every account is empty (np.inf if never).
+    """
+    balances = np.asarray(balances, dtype=float)
+    monthly_rates = np.broadcast_to(
+        net_monthly_return(np.asarray(annual_return, dtype=float), np.asarray(return_tax_rates, dtype=float)),
+        balances.shape,
+    )
+    month = np.arange(1, months + 1)
+    unfunded = first_withdrawal * (1 + inflation_rate / 100) ** ((month - 1) / 12)
+    paths = np.zeros((months, balances.size))
+
+    for account in order:
+        # An empty account funds nothing; interpolating its zero path would divide 0 by 0
+        if balances[account] <= 0:
+            continue
+        growth = (1 + monthly_rates[account]) ** month
+        gross = unfunded / (1 - withdrawal_tax_rates[account] / 100)
+        path = growth * (balances[account] - np.cumsum(gross / growth))
+        depleted = np.flatnonzero(path <= 0)
+        if depleted.size:
+            # The account covers part of the month it runs out in, like years_savings_last interpolates
+            last = depleted[0]
+            before = path[last - 1] if last > 0 else balances[account]
+            unfunded = np.where(month - 1 < last, 0.0, unfunded)
+            unfunded[last] *= 1 - before / (before - path[last])
+        else:
+            unfunded = np.zeros(months)
+        paths[:, account] = np.maximum(path, 0.0)
+
+    short = np.flatnonzero(unfunded > 0)
+    if short.size == 0:
+        return paths, np.inf
+    first_short = short[0]
+    funded = 1 - unfunded[first_short] / (first_withdrawal * (1 + inflation_rate / 100) ** (first_short / 12))
+    return paths, (first_short + funded) / 12
+
+
+# ---------------------------
+# Goal seek
+# ---------------------------
+def required_contribution(current_age, target_age, initial_savings, annual_lump_sum, annual_return, tax_rate,
+                          target_savings):
+    """Monthly contribution that reaches `target_savings` at `target_age`; 0 when already on track.
+
+    Savings are linear in the contribution, so this is closed form.
+    """
+    years = np.asarray(target_age, dtype=float) - current_age
+    annual_return = np.asarray(annual_return, dtype=float)
+    annual_growth, without_contributions = _yearly_growth(annual_return, tax_rate, 0.0, annual_lump_sum)
+    _, per_euro = _yearly_growth(annual_return, tax_rate, 1.0, 0.0)
+    base = _compound(initial_savings, annual_growth, without_contributions, years)
+    per_euro = _compound(0.0, annual_growth, per_euro, years)
+    return np.maximum((target_savings - base) / per_euro, 0.0)
+
+
+def years_to_target(initial_savings, monthly_contribution, annual_lump_sum, annual_return, tax_rate, target_savings):
+    """Fractional years until savings reach `target_savings`; np.inf if they never do.
+
+    Inverts the closed form (S0 + k) * g^y - k with a logarithm.
+    """
+    annual_growth, yearly_addition = _yearly_growth(
+        np.asarray(annual_return, dtype=float), tax_rate, monthly_contribution, annual_lump_sum
+    )
+    flat = annual_growth == 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        steady_state = yearly_addition / np.where(flat, 1.0, annual_growth - 1)
+        years = np.where(
+            flat,
+            (target_savings - initial_savings) / yearly_addition,
+            np.log((target_savings + steady_state) / (initial_savings + steady_state)) / np.log(annual_growth),
+        )
+    years = np.where(np.isfinite(years) & (years >= 0), years, np.inf)
+    return np.where(target_savings <= initial_savings, 0.0, years)
+
+
+def required_return(current_age, target_age, initial_savings, monthly_contribution, annual_lump_sum, tax_rate,
+                    target_savings, low=-20.0, high=50.0):
+    """Expected annual return (%) that reaches `target_savings` at `target_age`.
+
+    Bisection over the closed-form projection; np.nan when the target is
+    outside what returns between `low` and `high` can reach.
+    """
+    years = np.asarray(target_age, dtype=float) - current_age
+
+    def shortfall(annual_return):
+        annual_growth, yearly_addition = _yearly_growth(annual_return, tax_rate, monthly_contribution, annual_lump_sum)
+        return _compound(initial_savings, annual_growth, yearly_addition, years) - target_savings
+
+    shape = np.broadcast(years, np.asarray(target_savings)).shape
+    low, high = np.full(shape, float(low)), np.full(shape, float(high))
+    rate = bisect(shortfall, low, high, tol=1e-7)
+    return np.where((shortfall(low) <= 0) & (shortfall(high) >= 0), rate, np.nan)
+
+
+# ---------------------------
+# Glide path allocation
+# ---------------------------
+# Expected return and volatility (% per year) per asset class, in weight-column order
+ASSET_CLASSES = {
+    "Stocks": {"return": 7.0, "volatility": 15.0},
+    "Bonds": {"return": 3.0, "volatility": 6.0},
+    "Cash": {"return": 1.5, "volatility": 0.5},
+}
+ASSET_CORRELATIONS = np.array([
+    [1.0, 0.1, 0.0],
+    [0.1, 1.0, 0.2],
+    [0.0, 0.2, 1.0],
+])
+
+
+def default_glide_path(current_age, target_age, end_age, initial_stocks=90.0, retirement_stocks=40.0, cash=5.0):
+    """Built-in glide path as (years x assets) weights, one row per age from `current_age` to `end_age` - 1.
+
+    The stock share falls linearly until `target_age` and then stays put;
+    cash is constant and bonds take the remainder.
+    """
+    ages = np.arange(current_age, end_age)
+    stocks = np.interp(ages, [current_age, target_age], [initial_stocks, retirement_stocks])
+    stocks = np.minimum(stocks, 100.0 - cash)
+    return np.column_stack([stocks, 100.0 - cash - stocks, np.full(ages.size, cash)]) / 100
+
+
+def glide_path_from_table(table_ages, table_weights, current_age, end_age):
+    """Interpolate an uploaded (ages x assets) weight table to one row per simulated age, rows summing to 1."""
+    ages = np.arange(current_age, end_age)
+    order = np.argsort(table_ages)
+    table_ages = np.asarray(table_ages, dtype=float)[order]
+    table_weights = np.asarray(table_weights, dtype=float)[order]
+    weights = np.column_stack([np.interp(ages, table_ages, column) for column in table_weights.T])
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+def glide_path_return_model(weights, asset_returns, asset_volatilities, correlations=ASSET_CORRELATIONS):
+    """Per-year blended return model for a glide path.
+
+    Expected returns are the (years x assets) weights times the asset
+    returns; volatilities come from the quadratic form w Σ w' per year.
+    """
+    weights = np.asarray(weights, dtype=float)
+    asset_volatilities = np.asarray(asset_volatilities, dtype=float)
+    covariance = correlations * np.outer(asset_volatilities, asset_volatilities)
+    return {
+        "distribution": "normal",
+        "annual_returns": weights @ np.asarray(asset_returns, dtype=float),
+        "volatility": np.sqrt(np.einsum("ya,ab,yb->y", weights, covariance, weights)),
+    }
+
+
+def glide_path_savings(initial_savings, monthly_contribution, annual_lump_sum, annual_returns, tax_rate):
+    """Year-end invested savings when the expected return changes every year.
+
+    With growth g_k and additions a_k in year k, the balance is
+    P_y * (S0 + sum a_k / P_k) with P_y the running product of g_k, so the
+    whole path is one cumprod and one cumsum.
+    """
+    annual_growth, yearly_addition = _yearly_growth(
+        np.asarray(annual_returns, dtype=float), tax_rate, monthly_contribution, annual_lump_sum
+    )
+    cumulative_growth = np.concatenate(([1.0], np.cumprod(annual_growth)))
+    discounted_additions = np.concatenate(([0.0], np.cumsum(yearly_addition / cumulative_growth[1:])))
+    return cumulative_growth * (initial_savings + discounted_additions)
+
+
+# ----------------------
+# Monte Carlo simulation
+# ----------------------
+PERCENTILE_BANDS = (5, 25, 50, 75, 95)
+INFLATION_VOLATILITY = 1.5  # % per year
+
+# Return distribution per financial product; the mean comes from the expected return input
+PRODUCT_RETURN_MODELS = {
+    "ETF": {"volatility": 15.0, "distribution": "normal"},
+    "Aggressive Stocks": {"volatility": 25.0, "distribution": "student_t", "degrees_of_freedom": 4},
+    "Bonds": {"volatility": 6.0, "distribution": "normal"},
+    "Deposit Accounts": {"volatility": 0.5, "distribution": "normal"},
+}
+
+# ----------------------
+# Historical returns
+# ----------------------
+HISTORICAL_DATA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "historical_returns.npy"
+)
+HISTORICAL_BLOCK_YEARS = 5
+
+# Historical series (annual % returns) that the Monte Carlo replays for each financial product in
+# historical mode; products without one (see data/README.md) use their fitted distribution
+PRODUCT_HISTORICAL_SERIES = {
+    "ETF": "equities",
+    "Deposit Accounts": "cash",
+}
+
+
+def convert_historical_csv(csv_path, npy_path=HISTORICAL_DATA_PATH):
+    """Convert a CSV of annual % figures to the structured .npy dataset read by the simulator.
+
+    The CSV needs a header row with `year`, `inflation` and one column per
+    series in PRODUCT_HISTORICAL_SERIES, one row per calendar year in order.
+    """
+    data = np.genfromtxt(csv_path, delimiter=",", names=True, dtype=None, encoding="utf-8")
+    missing = {"year", "inflation", *PRODUCT_HISTORICAL_SERIES.values()} - set(data.dtype.names)
+    if missing:
+        raise ValueError(f"Missing columns in {csv_path}: {', '.join(sorted(missing))}")
+    os.makedirs(os.path.dirname(npy_path) or ".", exist_ok=True)
+    np.save(npy_path, data)
+
+
+@lru_cache(maxsize=None)
+def _memory_map(path):
+    return np.load(path, mmap_mode="r")
+
+
+def load_historical_returns(path=HISTORICAL_DATA_PATH):
+    """Memory-mapped historical dataset, opened once per process; None when the file is missing.
+
+    The pages stay in the OS page cache, so every session and worker process
+    shares a single copy of the data.
+    """
+    if not os.path.exists(path):
+        return None
+    return _memory_map(path)
+
+
+def historical_return_model(financial_product, block_years=HISTORICAL_BLOCK_YEARS, path=HISTORICAL_DATA_PATH):
+    """Block-bootstrap return model for a product, or None without a dataset or a series for the product."""
+    if financial_product not in PRODUCT_HISTORICAL_SERIES or load_historical_returns(path) is None:
+        return None
+    return {
+        "distribution": "historical", "series": PRODUCT_HISTORICAL_SERIES[financial_product],
+        "block_years": block_years, "path": path,
+    }
+
+
+def historical_mean_return(financial_product, path=HISTORICAL_DATA_PATH):
+    """Geometric mean annual return (%) of a product's historical series, or None without one."""
+    data = load_historical_returns(path)
+    if data is None or financial_product not in PRODUCT_HISTORICAL_SERIES:
+        return None
+    growth = 1 + np.asarray(data[PRODUCT_HISTORICAL_SERIES[financial_product]]) / 100
+    return float((np.exp(np.log(growth).mean()) - 1) * 100)
+
+
+def bootstrap_years(rng, available_years, years, paths, block_years):
+    """Row indices (years x paths) built from randomly placed runs of consecutive years.
+
+    Runs wrap around the end of the dataset (circular block bootstrap), so
+    every year is equally likely to be drawn and multi-year regimes survive.
+    """
+    blocks = -(-years // block_years)
+    starts = rng.integers(0, available_years, (blocks, 1, paths))
+    rows = (starts + np.arange(block_years)[:, None]) % available_years
+    return rows.reshape(blocks * block_years, paths)[:years]
+
+
+class PercentileAccumulator:
+    """Per-year histograms on fixed log-spaced bins, so percentiles need memory independent of path count.
+
+    Bin 0 collects depleted balances (below `low`) and the last bin anything
+    above `high`. `counts` may be an externally owned int64 buffer, e.g. shared memory.
+    With the default 16384 bins each bin spans 0.14%, and every estimate lies
+    within one bin of the two samples np.percentile interpolates between.
+    """
+
+    def __init__(self, years, bins=16384, low=1.0, high=1e10, counts=None):
+        self.edges = np.geomspace(low, high, bins + 1)
+        self.counts = np.zeros((years, bins + 2), dtype=np.int64) if counts is None else counts
+        self._log_low = math.log(low)
+        self._bins_per_log = bins / math.log(high / low)
+
+    def add(self, values):
+        """Add a (paths x years) block of values."""
+        years, width = self.counts.shape
+        # Bins are equal steps in log space, so the bin index is computed directly instead of searched
+        with np.errstate(divide="ignore"):
+            position = np.log(values)
+        position -= self._log_low
+        position *= self._bins_per_log
+        bins = np.clip(np.floor(position, out=position) + 1, 0, width - 1).astype(np.intp)
+        bins += np.arange(years) * width
+        self.counts += np.bincount(bins.ravel(), minlength=years * width).reshape(years, width)
+
+    def percentiles(self, percentiles=PERCENTILE_BANDS):
+        """Percentiles per year, interpolated geometrically inside each bin."""
+        cumulative = np.cumsum(self.counts, axis=1)
+        total = cumulative[:, -1:]
+        result = np.empty((len(percentiles), self.counts.shape[0]))
+        for row, percentile in enumerate(percentiles):
+            target = percentile / 100 * total
+            bin_index = np.minimum((cumulative < target).sum(axis=1), self.counts.shape[1] - 1)
+            below = np.take_along_axis(cumulative, bin_index[:, None], axis=1)[:, 0] - \
+                self.counts[np.arange(self.counts.shape[0]), bin_index]
+            inside = self.counts[np.arange(self.counts.shape[0]), bin_index]
+            fraction = np.clip((target[:, 0] - below) / np.maximum(inside, 1), 0, 1)
+
+            lower = self.edges[np.clip(bin_index - 1, 0, self.edges.size - 1)]
+            upper = self.edges[np.clip(bin_index, 0, self.edges.size - 1)]
+            value = lower * (upper / lower) ** fraction
+            result[row] = np.where(bin_index == 0, 0.0, np.where(bin_index == self.edges.size, upper, value))
+        return result
+
+
+def chunk_seed(seed, chunk_index):
+    """Independent random stream for one chunk of paths, the same however chunks are scheduled."""
+    return np.random.SeedSequence(seed, spawn_key=(chunk_index,))
+
+
+def _monthly_growth(rng, paths, monthly_mean, monthly_volatility, after_tax, return_model):
+    """A year of monthly growth factors (12 x paths), 1 + max(return, -99%) after tax.
+
+    Shocks are drawn as antithetic pairs: the second half of the paths
+    mirrors the first around the mean, which halves the random draws and
+    leaves the (symmetric) distributions unchanged.
+    """
+    half = -(-paths // 2)
+    if return_model["distribution"] == "student_t":
+        degrees = return_model["degrees_of_freedom"]
+        shocks = rng.standard_t(degrees, (12, half))
+        monthly_volatility = monthly_volatility * math.sqrt((degrees - 2) / degrees)
+    else:
+        shocks = rng.standard_normal((12, half))
+
+    center = 1 + monthly_mean * after_tax
+    growth = np.empty((12, paths))
+    np.multiply(shocks, monthly_volatility * after_tax, out=growth[:, :half])
+    growth[:, :half] += center
+    np.subtract(2 * center, growth[:, :paths - half], out=growth[:, half:])
+    return np.maximum(growth, 1 - 0.99 * after_tax, out=growth)
+
+
+def simulate_chunk(plan, paths, seed_sequence):
+    """Simulate one chunk of paths; returns real year-end savings (paths x years) and survival flags."""
+    rng = np.random.default_rng(seed_sequence)
+    return_model = plan["return_model"]
+    years = plan["end_age"] - plan["current_age"]
+    months_to_retirement = (plan["target_age"] - plan["current_age"]) * 12
+    after_tax = 1 - plan["tax_rate"] / 100
+
+    if return_model["distribution"] == "historical":
+        # Returns and inflation come from the same sampled years, keeping their joint behaviour
+        data = load_historical_returns(return_model["path"])
+        rows = bootstrap_years(rng, data.shape[0], years, paths, return_model["block_years"])
+        annual_inflation = np.asarray(data["inflation"])[rows] / 100
+        historical_growth = 1 + np.maximum(
+            (1 + np.asarray(data[return_model["series"]])[rows] / 100) ** (1 / 12) - 1, -0.99
+        ) * after_tax
+    else:
+        # Scalars or per-year arrays (glide paths) alike become one value per year
+        annual_returns = return_model.get("annual_returns", plan["annual_return"])
+        monthly_mean = np.broadcast_to(np.asarray(annual_returns, dtype=float) / 12 / 100, (years,))
+        monthly_volatility = np.broadcast_to(
+            np.asarray(return_model["volatility"], dtype=float) / math.sqrt(12) / 100, (years,)
+        )
+        annual_inflation = rng.normal(plan["inflation_rate"] / 100, INFLATION_VOLATILITY / 100, (years, paths))
+
+    # Inflation is drawn once per year and accrues evenly over its months
+    monthly_inflation = np.maximum(1 + annual_inflation, 0.5) ** (1 / 12)
+
+    balance = np.full(paths, float(plan["initial_savings"]))
+    price_level = np.ones(paths)
+    real_savings = np.empty((paths, years + 1))
+    real_savings[:, 0] = balance
+
+    for year in range(years):
+        if return_model["distribution"] == "historical":
+            growth = np.broadcast_to(historical_growth[year], (12, paths))
+        else:
+            growth = _monthly_growth(
+                rng, paths, monthly_mean[year], monthly_volatility[year], after_tax, return_model
+            )
+        withdrawal = plan["monthly_expenses"] * price_level
+
+        for month in range(year * 12 + 1, year * 12 + 13):
+            balance *= growth[month - year * 12 - 1]
+            if month <= months_to_retirement:
+                balance += plan["monthly_contribution"] + (plan["annual_lump_sum"] if month % 12 == 0 else 0.0)
+            else:
+                # Withdrawals keep their purchasing power
+                withdrawal *= monthly_inflation[year]
+                balance -= withdrawal
+
+        # A path that runs out stays negative for the rest of the year, so depleted
+        # paths can be floored at zero once a year instead of every month
+        np.maximum(balance, 0.0, out=balance)
+        price_level *= monthly_inflation[year] ** 12
+        real_savings[:, year + 1] = balance / price_level
+
+    # Depleted paths stay at zero, so surviving paths are the ones with savings left at the end
+    survived = balance > 0 if years * 12 > months_to_retirement else np.ones(paths, dtype=bool)
+    return real_savings, survived
+
+
+def _simulate_chunks(plan, paths, chunk_size, seed, accumulator, first_chunk=0, chunk_step=1):
+    """Simulate every `chunk_step`-th chunk from `first_chunk` into `accumulator`; returns the survivor count."""
+    survivors = 0
+    for chunk_index in range(first_chunk, -(-paths // chunk_size), chunk_step):
+        chunk_paths = min(chunk_size, paths - chunk_index * chunk_size)
+        real_savings, survived = simulate_chunk(plan, chunk_paths, chunk_seed(seed, chunk_index))
+        accumulator.add(real_savings)
+        survivors += int(survived.sum())
+    return survivors
+
+
+def _simulate_worker(buffer_name, counts_shape, worker, workers, plan, paths, chunk_size, seed):
+    """Process-pool entry point: accumulate this worker's chunks straight into its shared-memory slice."""
+    buffer = shared_memory.SharedMemory(name=buffer_name)
+    try:
+        counts = np.ndarray(counts_shape, dtype=np.int64, buffer=buffer.buf)[worker]
+        survivors = _simulate_chunks(
+            plan, paths, chunk_size, seed, PercentileAccumulator(counts_shape[1], counts=counts), worker, workers
+        )
+        del counts  # release the view so the buffer can be closed
+        return survivors
+    finally:
+        buffer.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _process_pool():
+    """Process pool shared by every simulation in this process, started on first use.
+
+    Workers come from a forkserver (or are spawned where there is none)
+    rather than forked, since forking a multithreaded server such as
+    Streamlit's is unsafe.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            start_method = "forkserver" if "forkserver" in get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=get_context(start_method))
+        return _pool
+
+
+def _discard_process_pool(pool):
+    """Drop a broken pool, so the next simulation starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _shutdown_process_pool():
+    with _pool_lock:
+        pool = _pool
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+atexit.register(_shutdown_process_pool)
+
+
+def _run_workers(buffer_name, counts, plan, paths, chunk_size, seed):
+    """Spread the chunks over the shared pool; None if the pool breaks again after one restart."""
+    workers = counts.shape[0]
+    for _ in range(2):
+        counts[:] = 0
+        pool = _process_pool()
+        try:
+            return sum(pool.map(
+                _simulate_worker, [buffer_name] * workers, [counts.shape] * workers, range(workers),
+                [workers] * workers, [plan] * workers, [paths] * workers, [chunk_size] * workers, [seed] * workers,
+            ))
+        except BrokenProcessPool:
+            # A worker died (killed, or out of memory), which breaks the whole pool
+            _discard_process_pool(pool)
+    return None
+
+
+def simulate_retirement(current_age, target_age, end_age, initial_savings, monthly_contribution, annual_lump_sum,
+                        annual_return, tax_rate, inflation_rate, monthly_expenses, return_model,
+                        paths=100_000, seed=0, chunk_size=16_384, workers=1):
+    """Monte Carlo retirement projection in today's euros.
+
+    Paths are simulated in fixed-size chunks, each seeded from (seed, chunk
+    index), and folded into per-year histograms, so memory stays bounded and a
+    given seed always reproduces the same bands. With `workers` > 1 the chunks
+    are spread over a process pool; each worker adds its histogram counts into
+    its own slice of a shared-memory buffer, and since counts are integers the
+    result is identical for any number of workers. The pool is started once
+    per process and reused; if a worker dies it is restarted once, and after
+    that the simulation runs in this process. Returns the ages, the
+    PERCENTILE_BANDS of real savings per age and the probability that savings
+    last until `end_age`. A "historical" `return_model` replays bootstrapped
+    years of returns and inflation instead of the expected return and inflation
+    inputs, and a model with per-year "annual_returns" (a glide path) overrides `annual_return`.
+    """
+    plan = {
+        "current_age": current_age, "target_age": target_age, "end_age": end_age,
+        "initial_savings": initial_savings, "monthly_contribution": monthly_contribution,
+        "annual_lump_sum": annual_lump_sum, "annual_return": annual_return, "tax_rate": tax_rate,
+        "inflation_rate": inflation_rate, "monthly_expenses": monthly_expenses, "return_model": return_model,
+    }
+    accumulator = PercentileAccumulator(end_age - current_age + 1)
+
+    if workers <= 1:
+        survivors = _simulate_chunks(plan, paths, chunk_size, seed, accumulator)
+    else:
+        counts_shape = (workers,) + accumulator.counts.shape
+        buffer = shared_memory.SharedMemory(create=True, size=int(np.prod(counts_shape)) * 8)
+        try:
+            counts = np.ndarray(counts_shape, dtype=np.int64, buffer=buffer.buf)
+            survivors = _run_workers(buffer.name, counts, plan, paths, chunk_size, seed)
+            if survivors is None:
+                # Chunks are seeded the same in any process, so running here gives the same result
+                survivors = _simulate_chunks(plan, paths, chunk_size, seed, accumulator)
+            else:
+                accumulator.counts += counts.sum(axis=0)
+            del counts
+        finally:
+            buffer.close()
+            buffer.unlink()
+
+    return {
+        "ages": np.arange(current_age, end_age + 1),
+        "percentiles": accumulator.percentiles(),
+        "success_probability": survivors / paths,
+    }
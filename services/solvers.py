@@ -0,0 +1,57 @@
+"""Vectorized root-finders shared by the simulators."""
+import numpy as np
+
+
+def bisect(func, low, high, tol=1e-9, max_iter=200):
+    """Find roots of `func` inside the brackets [low, high], element-wise.
+
+    `func` is called with an array shaped like the brackets and must change
+    sign over each bracket. Every element is refined in the same pass, so
+    solving for many scenarios costs about as much as solving for one.
+    """
+    low, high = np.broadcast_arrays(np.asarray(low, dtype=float), np.asarray(high, dtype=float))
+    low, high = low.copy(), high.copy()
+    f_low = func(low)
+
+    for _ in range(max_iter):
+        mid = (low + high) / 2
+        f_mid = func(mid)
+        same_side = np.sign(f_mid) == np.sign(f_low)
+        low = np.where(same_side, mid, low)
+        f_low = np.where(same_side, f_mid, f_low)
+        high = np.where(same_side, high, mid)
+        if np.all(high - low <= tol):
+            break
+
+    return (low + high) / 2
+
+
+def newton_bisect(func, derivative, low, high, guess=None, tol=1e-12, max_iter=100):
+    """Safeguarded Newton's method over the brackets [low, high], element-wise.
+
+    Newton steps converge quadratically near the root; any step that would
+    leave the current bracket falls back to bisection, so every element
+    converges as long as `func` changes sign over its bracket.
+    """
+    low, high = np.broadcast_arrays(np.asarray(low, dtype=float), np.asarray(high, dtype=float))
+    low, high = low.copy(), high.copy()
+    x = (low + high) / 2 if guess is None else np.broadcast_to(np.asarray(guess, dtype=float), low.shape).copy()
+    f_low = func(low)
+
+    for _ in range(max_iter):
+        f_x = func(x)
+        same_side = np.sign(f_x) == np.sign(f_low)
+        low = np.where(same_side, x, low)
+        f_low = np.where(same_side, f_x, f_low)
+        high = np.where(same_side, high, x)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            candidate = x - f_x / derivative(x)
+        inside = np.isfinite(candidate) & (candidate > low) & (candidate < high)
+        next_x = np.where(f_x == 0, x, np.where(inside, candidate, (low + high) / 2))
+        converged = np.all(np.abs(next_x - x) <= tol)
+        x = next_x
+        if converged:
+            break
+
+    return x
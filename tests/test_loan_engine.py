@@ -0,0 +1,193 @@
+"""Loan engine tests against month-by-month reference loops."""
+import datetime
+
+import numpy as np
+
+from financewebapp.services.loan_engine import (
+    PAID_OFF_BALANCE,
+    calculate_loan_schedule,
+    daily_accrual_schedule,
+    days_in_periods,
+    exact_amortization_arrays,
+    exact_amortization_cents,
+    loan_totals,
+    payoff_month,
+    refinance_analysis,
+    sensitivity_grid,
+    required_extra_payment,
+)
+
+
+def loop_schedule(principal, annual_interest_rate, loan_term_years, monthly_extra_payment, rate_schedule=()):
+    """Reference schedule built month by month, as the original Loan Simulator loop did.
+
+    The payment is recast on the remaining balance and term at every reset, and
+    a balance under half a cent counts as repaid, as in the engine.
+    """
+    total_months = loan_term_years * 12
+    resets = dict(rate_schedule)
+    balance = principal
+    total_interest = 0.0
+    rows = []
+    for month in range(1, total_months + 1):
+        if month == 1 or month in resets:
+            rate = resets.get(month, annual_interest_rate) / 12 / 100
+            remaining = total_months - month + 1
+            payment = balance * rate * (1 + rate) ** remaining / ((1 + rate) ** remaining - 1) if rate else \
+                balance / remaining
+        interest = balance * rate
+        total_interest += interest
+        balance -= payment - interest + monthly_extra_payment
+        if balance < PAID_OFF_BALANCE:
+            balance = 0.0
+        rows.append((month, payment + monthly_extra_payment, payment - interest + monthly_extra_payment, interest,
+                     balance, total_interest))
+        if balance == 0:
+            break
+    return np.array(rows)
+
+
+def random_loans(seed, cases):
+    """(principal, annual rate %, term in years, monthly extra payment) for `cases` random loans."""
+    rng = np.random.default_rng(seed)
+    for _ in range(cases):
+        yield (round(float(rng.uniform(1_000, 1_000_000)), 2), round(float(rng.uniform(0.0, 12.0)), 2),
+               int(rng.integers(1, 31)), 0.0 if rng.random() < 0.5 else round(float(rng.uniform(0, 2_000)), 2))
+
+
+def test_schedule_matches_loop_to_the_cent():
+    for loan in random_loans(1, 300):
+        schedule = calculate_loan_schedule(*loan).to_numpy()
+        reference = loop_schedule(*loan)
+        assert schedule.shape == reference.shape, loan
+        assert np.abs(schedule - reference).max() < 0.005, loan
+
+
+def test_zero_rate_schedule_repays_in_equal_parts():
+    schedule = calculate_loan_schedule(12_000.0, 0.0, 1, 0.0)
+    assert len(schedule) == 12
+    assert np.allclose(schedule["Monthly Payment (€)"], 1_000.0)
+    assert schedule["Total Interest Paid (€)"].iloc[-1] == 0.0
+
+
+def test_payoff_month_matches_schedule_length():
+    for loan in random_loans(3, 300):
+        assert payoff_month(*loan) == len(calculate_loan_schedule(*loan)), loan
+
+
+def test_required_extra_payment_is_the_smallest_cent():
+    assert float(required_extra_payment(296_877.57, 5.2, 11, 111)) == 416.82
+    rng = np.random.default_rng(3)
+    for principal, rate, years, _ in random_loans(4, 300):
+        target = int(rng.integers(1, years * 12 + 1))
+        extra = float(required_extra_payment(principal, rate, years, target))
+        assert len(calculate_loan_schedule(principal, rate, years, extra)) <= target
+        if extra > 0:
+            assert len(calculate_loan_schedule(principal, rate, years, round(extra - 0.01, 2))) > target
+
+
+def test_required_extra_payment_is_zero_when_on_track():
+    assert required_extra_payment(100_000.0, 5.0, 15, 180) == 0.0
+    assert required_extra_payment(100_000.0, 5.0, 15, 400) == 0.0
+
+
+def random_resets(rng, years):
+    """Up to four (month, annual rate %) resets after the first month."""
+    months = rng.choice(np.arange(2, years * 12 + 1), size=min(int(rng.integers(0, 5)), years * 12 - 1),
+                        replace=False)
+    return [(int(month), round(float(rng.uniform(0.5, 10.0)), 2)) for month in np.sort(months)]
+
+
+def test_rate_resets_match_loop_to_the_cent():
+    rng = np.random.default_rng(5)
+    for loan in random_loans(5, 300):
+        rate_schedule = random_resets(rng, loan[2])
+        schedule = calculate_loan_schedule(*loan, rate_schedule).to_numpy()
+        reference = loop_schedule(*loan, rate_schedule)
+        assert schedule.shape == reference.shape, (loan, rate_schedule)
+        assert np.abs(schedule - reference).max() < 0.005, (loan, rate_schedule)
+
+
+def test_loan_totals_match_last_schedule_row():
+    for principal, rate, years, extra in random_loans(6, 300):
+        schedule = calculate_loan_schedule(principal, rate, years, extra)
+        totals = loan_totals(principal, rate, years * 12, extra)
+        assert totals["Payoff Month"] == len(schedule)
+        assert abs(totals["Total Interest Paid (€)"] - schedule["Total Interest Paid (€)"].iloc[-1]) < 1e-4
+        assert abs(totals["Total Amount Paid (€)"] - schedule["Monthly Payment (€)"].sum()) < 1e-4
+
+
+def test_sensitivity_grid_matches_single_loans():
+    rates, terms = np.round(np.arange(0, 101) * 0.1, 1), np.arange(1, 31)
+    grid = sensitivity_grid(100_000.0, 100.0, rates, terms)
+    for term_index, rate_index in ((0, 0), (9, 45), (29, 100)):
+        totals = loan_totals(100_000.0, rates[rate_index], terms[term_index] * 12, 100.0)
+        for name, value in totals.items():
+            assert np.isclose(grid[name][term_index, rate_index], value, rtol=1e-12)
+
+
+def test_refinance_break_even_falls_within_the_refinanced_loan():
+    rng = np.random.default_rng(7)
+    candidate_rates = np.linspace(0.5, 12.0, 24)
+    for principal, rate, years, extra in random_loans(7, 50):
+        analysis = refinance_analysis(principal, rate, years, extra, candidate_rates,
+                                      np.full(24, float(rng.uniform(0, 10_000))))
+        refinance_month = analysis["Refinance Month"][:, None]
+        balance = calculate_loan_schedule(principal, rate, years, extra)["Remaining Balance (€)"].to_numpy()
+        refinanced_payoff = loan_totals(
+            balance[refinance_month - 1], candidate_rates, years * 12 - refinance_month, extra
+        )["Payoff Month"]
+        break_even = analysis["Break-even Month"]
+        reached = ~np.isnan(break_even)
+        assert (break_even[reached] <= (refinance_month + refinanced_payoff)[reached]).all()
+        assert (analysis["Net Savings (€)"][reached] > 0).all()
+
+
+def test_refinance_never_breaks_even_at_a_higher_rate():
+    analysis = refinance_analysis(300_000.0, 4.0, 30, 0.0, [5.0, 6.0], [0.0, 0.0])
+    assert np.isnan(analysis["Break-even Month"]).all()
+
+
+def test_single_exact_loan_posts_the_book_engine_cents():
+    rng = np.random.default_rng(8)
+    for loan in random_loans(8, 300):
+        rate_schedule = random_resets(rng, loan[2]) if rng.random() < 0.3 else None
+        book = exact_amortization_cents(*loan, rate_schedule)
+        single = exact_amortization_arrays(*loan, rate_schedule)
+        months = int(book["payoff_month"][0])
+        assert len(single["Month"]) == months
+        for column, key in (("Monthly Payment (€)", "payment"), ("Interest Payment (€)", "interest"),
+                            ("Remaining Balance (€)", "balance")):
+            assert (np.round(np.asarray(single[column]) * 100).astype(np.int64) == book[key][0, :months]).all()
+
+
+def test_exact_schedule_ends_on_zero_cents():
+    schedule = calculate_loan_schedule(250_000.0, 3.75, 25, 0.0, exact=True)
+    cents = np.round(schedule[["Monthly Payment (€)", "Interest Payment (€)"]].to_numpy() * 100)
+    assert schedule["Remaining Balance (€)"].iloc[-1] == 0.0
+    assert cents[:, 0].sum() - cents[:, 1].sum() == 25_000_000
+
+
+def test_resets_at_or_before_the_first_month_replace_the_initial_rate():
+    for principal, rate, years, extra in random_loans(9, 30):
+        for exact in (False, True):
+            expected = calculate_loan_schedule(principal, 6.5, years, extra, exact=exact)
+            for month in (-1, 0, 1):
+                reset = calculate_loan_schedule(principal, rate, years, extra, [(month, 6.5)], exact=exact)
+                assert reset.equals(expected), (principal, rate, years, extra, month, exact)
+        book = exact_amortization_cents(principal, rate, years, extra, [(0, 6.5)])
+        assert int(book["payoff_month"][0]) == len(expected)
+
+
+def test_actual_day_counts_follow_the_start_date():
+    assert days_in_periods(3, "actual/365", datetime.date(2024, 1, 15)).tolist() == [31, 29, 31]
+    assert days_in_periods(3, "actual/365", "2023-01").tolist() == [31, 28, 31]
+    assert days_in_periods(3, "30/360", datetime.date(2024, 1, 15)).tolist() == [30, 30, 30]
+
+
+def test_daily_accrual_repays_the_loan():
+    for day_count in ("actual/365", "30/360"):
+        schedule = daily_accrual_schedule(200_000.0, 4.5, 30, 0.0, datetime.date(2025, 3, 1), day_count)
+        assert len(schedule) == 360
+        assert abs(schedule["Remaining Balance (€)"].iloc[-1]) < 0.005
+        assert np.isclose(schedule["Principal Payment (€)"].sum(), 200_000.0, atol=0.01)
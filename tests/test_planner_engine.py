@@ -0,0 +1,127 @@
+"""FinancePro Planner engine tests against single-scenario runs and reference loops."""
+import numpy as np
+
+from financewebapp.services.planner_engine import (
+    NET_WORTH_SCENARIOS,
+    invested_balance,
+    months_to_target,
+    planner_cash_flows,
+    rent_vs_buy_grid,
+    required_investment_rate,
+    required_monthly_savings,
+    simulate_planner,
+    year_end,
+)
+
+
+def loop_invested_balance(initial, contributions, monthly_return):
+    """Reference month-end balances: earn the return, then add the month's contribution."""
+    balances = [initial]
+    for contribution in contributions:
+        balances.append(balances[-1] * (1 + monthly_return) + contribution)
+    return np.array(balances)
+
+
+def random_scenarios(seed, cases):
+    """Keyword arguments of planner_cash_flows for random households."""
+    rng = np.random.default_rng(seed)
+    for _ in range(cases):
+        yield {
+            "initial_capital": float(rng.uniform(20_000, 300_000)), "monthly_savings": float(rng.uniform(500, 5_000)),
+            "investment_rate": float(rng.uniform(0, 10)), "property_price": float(rng.uniform(150_000, 900_000)),
+            "property_growth": float(rng.uniform(0, 5)), "mortgage_rate": float(rng.uniform(0.5, 8)),
+            "mortgage_years": int(rng.integers(10, 31)), "down_payment": float(rng.uniform(10, 40)),
+            "monthly_rent": float(rng.uniform(500, 3_000)), "rent_growth": float(rng.uniform(0, 4)),
+            "years": int(rng.integers(5, 31)),
+        }
+
+
+def without(scenario, key):
+    """Scenario arguments minus the one a goal seek solves for."""
+    return {name: value for name, value in scenario.items() if name != key}
+
+
+def test_invested_balance_matches_monthly_loop():
+    rng = np.random.default_rng(21)
+    for _ in range(300):
+        contributions = rng.uniform(-2_000, 5_000, int(rng.integers(1, 480)))
+        monthly_return, initial = float(rng.uniform(-0.005, 0.01)), float(rng.uniform(0, 200_000))
+        reference = loop_invested_balance(initial, contributions, monthly_return)
+        error = np.abs(invested_balance(initial, contributions, monthly_return) - reference)
+        assert (error <= 1e-9 * np.maximum(np.abs(reference), 1.0)).all()
+
+
+def test_cash_flows_balance_savings_against_housing_costs():
+    for scenario in random_scenarios(21, 100):
+        flows = planner_cash_flows(**scenario)
+        months = scenario["years"] * 12 + 1
+        assert all(path.shape == (months,) for path in flows.values())
+        principal = scenario["property_price"] * (1 - scenario["down_payment"] / 100)
+        assert np.isclose(flows["mortgage_balance"][0], principal)
+        assert (np.diff(flows["mortgage_balance"]) <= 1e-9).all()
+        assert np.allclose(flows["buy_net_worth"], flows["buy_investments"] + flows["equity"])
+        assert flows["rent_net_worth"][0] == scenario["initial_capital"]
+
+
+def test_rent_vs_buy_grid_cells_match_single_scenarios():
+    investment_rates, property_growths, mortgage_rates = np.arange(0, 11.0), np.arange(0, 6.0), np.arange(1, 8.0)
+    holding_years = np.array([5, 10, 20, 30])
+    rng = np.random.default_rng(23)
+    for scenario in random_scenarios(23, 100):
+        grid = rent_vs_buy_grid(
+            scenario["initial_capital"], scenario["monthly_savings"], scenario["property_price"],
+            scenario["down_payment"], scenario["mortgage_years"], scenario["monthly_rent"], scenario["rent_growth"],
+            investment_rates, property_growths, mortgage_rates, holding_years,
+        )
+        assert grid.shape == (11, 6, 7, 4)
+        cell = tuple(int(rng.integers(size)) for size in grid.shape)
+        flows = planner_cash_flows(**{
+            **scenario, "investment_rate": investment_rates[cell[0]], "property_growth": property_growths[cell[1]],
+            "mortgage_rate": mortgage_rates[cell[2]], "years": int(holding_years[cell[3]]),
+        })
+        expected = flows["buy_net_worth"][-1] - flows["rent_net_worth"][-1]
+        assert np.isclose(grid[cell], expected, rtol=1e-10, atol=1e-6)
+
+
+def test_planner_simulation_without_volatility_follows_the_cash_flows():
+    scenario = next(random_scenarios(24, 1))
+    simulation = simulate_planner(**scenario, investment_volatility=0.0, property_volatility=0.0, paths=1_000)
+    flows = planner_cash_flows(**scenario)
+    # Only the Cholesky jitter of 1e-12 on the covariance is left as noise
+    for percentiles, path in (("investment_percentiles", "rent_net_worth"), ("property_percentiles", "property_value")):
+        expected = year_end(flows[path])
+        assert np.allclose(simulation[percentiles], expected, rtol=0, atol=1e-4 * np.abs(expected).max())
+    rent_wins = year_end(flows["rent_net_worth"]) > year_end(flows["buy_net_worth"])
+    assert np.array_equal(simulation["invest_beats_buy"], rent_wins.astype(float))
+
+
+def test_planner_simulation_is_reproducible_from_its_seed():
+    scenario = next(random_scenarios(24, 1))
+    first, again = (simulate_planner(**scenario, paths=5_000, seed=7) for _ in range(2))
+    for key in ("investment_percentiles", "property_percentiles", "invest_beats_buy"):
+        assert np.array_equal(first[key], again[key])
+    assert ((first["invest_beats_buy"] >= 0) & (first["invest_beats_buy"] <= 1)).all()
+
+
+def test_planner_goal_seek_reaches_the_target():
+    rng = np.random.default_rng(25)
+    for scenario in random_scenarios(25, 200):
+        name = str(rng.choice(list(NET_WORTH_SCENARIOS)))
+        path = NET_WORTH_SCENARIOS[name]
+        target = float(planner_cash_flows(**scenario)[path][-1] * rng.uniform(0.8, 1.5))
+
+        savings = float(required_monthly_savings(target, name, **without(scenario, "monthly_savings")))
+        reached = planner_cash_flows(**{**scenario, "monthly_savings": savings})[path][-1]
+        assert np.isclose(reached, target, rtol=1e-9) if savings > 0 else reached >= target
+
+        rate = float(required_investment_rate(target, name, **without(scenario, "investment_rate")))
+        if not np.isnan(rate):
+            # The rate is bisected to 1e-7 %, which is within a euro even for targets near zero
+            reached = planner_cash_flows(**{**scenario, "investment_rate": rate})[path][-1]
+            assert np.isclose(reached, target, rtol=1e-6, atol=1.0)
+
+        months = months_to_target(target, name, **without(scenario, "years"))
+        if np.isfinite(months):
+            net_worth = planner_cash_flows(**{**scenario, "years": 100})[path]
+            assert net_worth[int(months)] >= target
+            assert int(months) == 0 or net_worth[int(months) - 1] < target
@@ -0,0 +1,272 @@
+"""Retirement engine tests against month-by-month reference loops."""
+import os
+import signal
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from financewebapp.services import retirement_engine
+from financewebapp.services.retirement_engine import (
+    PERCENTILE_BANDS,
+    PRODUCT_HISTORICAL_SERIES,
+    PRODUCT_RETURN_MODELS,
+    PercentileAccumulator,
+    calculate_invested_savings,
+    compare_products,
+    default_glide_path,
+    glide_path_from_table,
+    glide_path_return_model,
+    glide_path_savings,
+    historical_return_model,
+    load_historical_returns,
+    multi_account_drawdown,
+    multi_account_savings,
+    required_contribution,
+    required_return,
+    simulate_retirement,
+    years_savings_last,
+    years_to_target,
+)
+
+
+def loop_invested_savings(current_age, target_age, initial_savings, monthly_contribution, annual_lump_sum,
+                          annual_return, tax_rate):
+    """Reference year-end savings compounded month by month, as the original Retirement Simulator loop did."""
+    monthly_rate = annual_return * (1 - tax_rate / 100) / 12 / 100
+    savings = [initial_savings]
+    for month in range(1, (target_age - current_age) * 12 + 1):
+        balance = savings[-1] * (1 + monthly_rate) + monthly_contribution
+        savings.append(balance + annual_lump_sum if month % 12 == 0 else balance)
+    return np.array(savings[::12])
+
+
+def random_plans(seed, cases):
+    """(current age, target age, savings, monthly contribution, lump sum, return %, tax %) for random savers."""
+    rng = np.random.default_rng(seed)
+    for _ in range(cases):
+        current_age = int(rng.integers(18, 70))
+        yield (current_age, int(rng.integers(current_age + 1, 101)), float(rng.uniform(0, 100_000)),
+               float(rng.uniform(0, 5_000)), 0.0 if rng.random() < 0.5 else float(rng.uniform(0, 20_000)),
+               0.0 if rng.random() < 0.1 else round(float(rng.uniform(0, 15)), 1), float(rng.uniform(0, 50)))
+
+
+def relative_error(values, reference):
+    return float((np.abs(values - reference) / np.maximum(np.abs(reference), 1.0)).max())
+
+
+def test_invested_savings_match_monthly_loop():
+    for plan in random_plans(11, 500):
+        assert relative_error(calculate_invested_savings(*plan), loop_invested_savings(*plan)) < 1e-10, plan
+
+
+def test_invested_savings_without_return_add_up_contributions():
+    savings = calculate_invested_savings(30, 40, 1_000.0, 100.0, 500.0, 0.0, 15.0)
+    assert np.allclose(savings, 1_000.0 + np.arange(11) * 1_700.0)
+
+
+def etf_simulation(paths=20_000, seed=0, **options):
+    return simulate_retirement(30, 65, 95, 10_000.0, 1_000.0, 0.0, 6.0, 15.0, 2.0, 2_000.0,
+                               PRODUCT_RETURN_MODELS["ETF"], paths=paths, seed=seed, **options)
+
+
+def test_percentiles_lie_within_one_bin_of_the_bracketing_samples():
+    rng = np.random.default_rng(12)
+    samples = 50_000
+    values = np.exp(rng.normal(np.log(500_000), 1.5, (samples, 3)))
+    values[rng.random((samples, 3)) < 0.2] = 0.0
+    accumulator = PercentileAccumulator(years=3)
+    accumulator.add(values[:samples // 2])
+    accumulator.add(values[samples // 2:])
+
+    bin_ratio = accumulator.edges[1] / accumulator.edges[0]
+    ordered = np.sort(values, axis=0)
+    estimates = accumulator.percentiles()
+    for row, percentile in enumerate(PERCENTILE_BANDS):
+        position = percentile / 100 * (samples - 1)
+        below, above = ordered[int(np.floor(position))], ordered[int(np.ceil(position))]
+        assert (estimates[row] >= below / bin_ratio).all() and (estimates[row] <= above * bin_ratio).all()
+
+
+def test_simulation_is_reproducible_from_its_seed():
+    first, again, other = etf_simulation(seed=1), etf_simulation(seed=1), etf_simulation(seed=2)
+    assert np.array_equal(first["percentiles"], again["percentiles"])
+    assert first["success_probability"] == again["success_probability"]
+    assert not np.array_equal(first["percentiles"], other["percentiles"])
+    assert 0.0 < first["success_probability"] < 1.0
+    assert (np.diff(first["percentiles"], axis=0) >= 0).all()
+
+
+def assert_same_simulation(result, expected):
+    assert np.array_equal(result["percentiles"], expected["percentiles"])
+    assert result["success_probability"] == expected["success_probability"]
+
+
+def test_results_are_identical_for_any_worker_count():
+    expected = etf_simulation(chunk_size=4_096)
+    for workers in (2, 3):
+        assert_same_simulation(etf_simulation(chunk_size=4_096, workers=workers), expected)
+
+
+def test_pool_restarts_after_a_worker_dies():
+    expected = etf_simulation(chunk_size=4_096)
+    etf_simulation(chunk_size=4_096, workers=2)
+    broken = retirement_engine._process_pool()
+    for process in list(broken._processes.values()):
+        os.kill(process.pid, signal.SIGKILL)
+    assert_same_simulation(etf_simulation(chunk_size=4_096, workers=2), expected)
+    assert retirement_engine._process_pool() is not broken
+
+
+class BrokenPool:
+    def map(self, *iterables):
+        raise BrokenProcessPool("worker killed")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_simulation_falls_back_in_process_when_the_pool_keeps_breaking(monkeypatch):
+    expected = etf_simulation(chunk_size=4_096)
+    monkeypatch.setattr(retirement_engine, "_process_pool", BrokenPool)
+    assert_same_simulation(etf_simulation(chunk_size=4_096, workers=2), expected)
+
+
+def loop_years_lasted(balance, first_withdrawal, annual_return, inflation_rate, tax_rate, max_years=100):
+    """Reference drawdown month by month, interpolating within the month the balance runs out."""
+    monthly_rate = annual_return * (1 - tax_rate / 100) / 12 / 100
+    indexation = (1 + inflation_rate / 100) ** (1 / 12)
+    for month in range(max_years * 12):
+        after = balance * (1 + monthly_rate) - first_withdrawal * indexation ** month
+        if after <= 0:
+            return (month + balance / (balance - after)) / 12
+        balance = after
+    return np.inf
+
+
+def random_drawdowns(seed, cases):
+    """(balance, first monthly withdrawal, return %, inflation %, tax %) for random retirees."""
+    rng = np.random.default_rng(seed)
+    for _ in range(cases):
+        yield (float(rng.uniform(10_000, 2_000_000)), float(rng.uniform(500, 10_000)), float(rng.uniform(0, 10)),
+               float(rng.uniform(0, 5)), float(rng.uniform(0, 40)))
+
+
+def test_years_savings_last_matches_monthly_loop():
+    for drawdown in random_drawdowns(14, 500):
+        years, reference = float(years_savings_last(*drawdown)), loop_years_lasted(*drawdown)
+        assert years == reference if np.isinf(reference) else abs(years - reference) < 1e-6, drawdown
+
+
+def test_savings_last_forever_without_withdrawals():
+    assert np.isinf(years_savings_last(0.0, 0.0, 5.0, 2.0, 15.0))
+    assert np.isinf(years_savings_last(100_000.0, 0.0, 0.0, 2.0, 15.0))
+    assert years_savings_last(0.0, 1_000.0, 5.0, 2.0, 15.0) == 0.0
+
+
+def test_historical_dataset_covers_the_mapped_series():
+    data = load_historical_returns()
+    assert {"year", "inflation", *PRODUCT_HISTORICAL_SERIES.values()} <= set(data.dtype.names)
+    assert (np.diff(data["year"]) == 1).all()
+    assert historical_return_model("ETF")["series"] == "equities"
+    assert historical_return_model("Bonds") is None
+
+
+def test_historical_simulation_ignores_the_return_and_inflation_inputs():
+    model = historical_return_model("ETF")
+    results = [
+        simulate_retirement(30, 65, 95, 10_000.0, 1_000.0, 0.0, annual_return, 15.0, inflation_rate, 2_000.0, model,
+                            paths=5_000, seed=3)
+        for annual_return, inflation_rate in ((6.0, 2.0), (1.0, 8.0))
+    ]
+    assert_same_simulation(results[1], results[0])
+
+
+def test_product_comparison_matches_single_projections():
+    returns = [6.0, 10.0, 3.0, 1.5, 0.0]
+    comparison = compare_products(35, 65, 95, 20_000.0, 800.0, 2_000.0, returns, 15.0, 2.0, 2_500.0)
+    first_withdrawal = 2_500.0 * 1.02 ** 30
+    for row, annual_return in enumerate(returns):
+        invested = calculate_invested_savings(35, 65, 20_000.0, 800.0, 2_000.0, annual_return, 15.0)
+        assert np.allclose(comparison["invested"][row], invested, rtol=1e-12)
+        assert comparison["years_last"][row] == years_savings_last(invested[-1], first_withdrawal, annual_return,
+                                                                   2.0, 15.0)
+
+
+def test_constant_glide_path_matches_the_flat_projection():
+    for current_age, target_age, initial, monthly, lump_sum, annual_return, tax_rate in random_plans(17, 200):
+        glide = glide_path_savings(initial, monthly, lump_sum, np.full(target_age - current_age, annual_return),
+                                   tax_rate)
+        flat = calculate_invested_savings(current_age, target_age, initial, monthly, lump_sum, annual_return,
+                                          tax_rate)
+        assert relative_error(glide, flat) < 1e-10
+
+
+def test_glide_path_weights_sum_to_one_and_blend_returns():
+    weights = default_glide_path(30, 65, 95, 90.0, 40.0, 5.0)
+    assert weights.shape == (65, 3) and np.allclose(weights.sum(axis=1), 1.0)
+    assert np.allclose(weights[0], [0.9, 0.05, 0.05]) and np.allclose(weights[-1], [0.4, 0.55, 0.05])
+
+    table = glide_path_from_table([60, 30], [[20.0, 20.0, 10.0], [90.0, 5.0, 5.0]], 30, 70)
+    assert np.allclose(table.sum(axis=1), 1.0) and np.allclose(table[-1], [0.4, 0.4, 0.2])
+
+    model = glide_path_return_model(weights, [7.0, 3.0, 1.0], [16.0, 6.0, 0.5])
+    assert np.allclose(model["annual_returns"], weights @ [7.0, 3.0, 1.0])
+    assert (model["volatility"][1:] <= model["volatility"][:-1] + 1e-12).all()
+
+
+def test_single_account_drains_like_years_savings_last():
+    for balance, withdrawal, annual_return, inflation_rate, tax_rate in random_drawdowns(20, 300):
+        years = years_savings_last(balance, withdrawal, annual_return, inflation_rate, tax_rate)
+        # Empty accounts around the funded one must not change the result or produce NaN
+        paths, account_years = multi_account_drawdown(
+            [0.0, balance, 0.0], withdrawal, annual_return, [tax_rate] * 3, [0.0] * 3, inflation_rate, [0, 1, 2]
+        )
+        assert np.isclose(account_years, years, rtol=0, atol=1e-9)
+        assert not np.isnan(paths).any() and (paths[:, [0, 2]] == 0).all()
+
+
+def test_accounts_last_forever_without_withdrawals():
+    paths, years = multi_account_drawdown([0.0, 50_000.0], 0.0, 5.0, [15.0, 0.0], [0.0, 20.0], 2.0, [0, 1])
+    assert np.isinf(years) and not np.isnan(paths).any()
+
+
+def test_contributions_fill_account_caps_in_order():
+    balances = multi_account_savings(30, 31, [0.0, 0.0, 0.0], 1_000.0, 5_000.0, 0.0, [0.0, 0.0, 0.0],
+                                     [6_000.0, 7_000.0, np.inf])
+    # 12,000 of monthly savings fill the first cap and 6,000 of the second; the lump sum tops up the second
+    assert np.allclose(balances[-1], [6_000.0, 7_000.0, 4_000.0])
+
+
+def test_retirement_goal_seek_reaches_the_target():
+    rng = np.random.default_rng(25)
+    for current_age, target_age, initial, monthly, lump_sum, annual_return, tax_rate in random_plans(25, 300):
+        projected = calculate_invested_savings(current_age, target_age, initial, monthly, lump_sum, annual_return,
+                                               tax_rate)[-1]
+        target = float(projected * rng.uniform(0.8, 1.5))
+
+        contribution = float(required_contribution(current_age, target_age, initial, lump_sum, annual_return,
+                                                   tax_rate, target))
+        reached = calculate_invested_savings(current_age, target_age, initial, contribution, lump_sum,
+                                             annual_return, tax_rate)[-1]
+        assert np.isclose(reached, target, rtol=1e-9) if contribution > 0 else reached >= target
+
+        annual_return_needed = float(required_return(current_age, target_age, initial, monthly, lump_sum, tax_rate,
+                                                     target))
+        if not np.isnan(annual_return_needed):
+            reached = calculate_invested_savings(current_age, target_age, initial, monthly, lump_sum,
+                                                 annual_return_needed, tax_rate)[-1]
+            assert np.isclose(reached, target, rtol=1e-6)
+
+        years = float(years_to_target(initial, monthly, lump_sum, annual_return, tax_rate, target))
+        if np.isfinite(years) and years > 0:
+            path = calculate_invested_savings(0, int(np.ceil(years)) + 1, initial, monthly, lump_sum, annual_return,
+                                              tax_rate)
+            assert path[int(np.floor(years))] <= target * (1 + 1e-9)
+            assert path[int(np.ceil(years))] >= target * (1 - 1e-9)
+
+
+def test_retirement_goal_seek_edge_cases():
+    assert required_contribution(30, 65, 1_000_000.0, 0.0, 5.0, 15.0, 500_000.0) == 0.0
+    assert years_to_target(600_000.0, 0.0, 0.0, 5.0, 15.0, 500_000.0) == 0.0
+    assert np.isinf(years_to_target(0.0, 0.0, 0.0, 5.0, 15.0, 500_000.0))
+    assert np.isnan(required_return(30, 31, 0.0, 10.0, 0.0, 15.0, 1_000_000.0))